@@ -0,0 +1,106 @@
+"""Cold-start budget for the Streamlit app.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--json]
+
+Every run starts a fresh interpreter, as a restarted container would, and
+measures:
+
+    import        importing the modules app.py loads at start-up
+    first_render  first script run of app.py for a new session (AppTest),
+                  i.e. what it takes to paint the input form
+    rerun         a second run of the same session
+
+It also checks that the first render does not load pandas or fpdf, which
+are only needed once a schedule is generated or downloaded. The median of
+each measurement is compared to its budget; the exit code is 1 when a
+budget is exceeded or a heavy module was loaded early.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds, median over the runs (measured at about 0.005 / 0.3 / 0.05 s)
+BUDGETS = {
+    "import": 0.1,
+    "first_render": 1.0,
+    "rerun": 0.25,
+}
+
+# Must not be imported before the user asks for a schedule or a PDF
+LAZY_MODULES = ("pandas", "fpdf")
+
+_PROBE = """
+import json, logging, sys, time
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest
+
+start = time.perf_counter()
+import engine, quran_data
+import_time = time.perf_counter() - start
+
+at = AppTest.from_file("app.py", default_timeout=60)
+start = time.perf_counter()
+at.run()
+first_render = time.perf_counter() - start
+loaded = [name for name in {lazy!r} if name in sys.modules]
+
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+
+print(json.dumps({{
+    "import": import_time,
+    "first_render": first_render,
+    "rerun": rerun,
+    "loaded": loaded,
+    "exception": bool(at.exception),
+}}))
+"""
+
+
+def measure_once():
+    """One cold start in a fresh interpreter; returns the probe's dict"""
+    probe = _PROBE.format(lazy=LAZY_MODULES)
+    completed = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", probe],
+        cwd=APP_DIR, capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check app.py import and first-render time against budgets")
+    parser.add_argument("--runs", type=int, default=5, help="cold starts to measure (default: 5)")
+    parser.add_argument("--json", action="store_true", help="print the result as one JSON line")
+    args = parser.parse_args(argv)
+
+    runs = [measure_once() for _ in range(max(1, args.runs))]
+    medians = {name: statistics.median(run[name] for run in runs) for name in BUDGETS}
+    loaded = sorted({name for run in runs for name in run["loaded"]})
+    failed = any(run["exception"] for run in runs)
+
+    over = [name for name, budget in BUDGETS.items() if medians[name] > budget]
+    ok = not over and not loaded and not failed
+
+    if args.json:
+        print(json.dumps({"timings": medians, "budgets": BUDGETS, "eager_modules": loaded,
+                          "exception": failed, "ok": ok}))
+    else:
+        for name, budget in BUDGETS.items():
+            status = "over budget" if name in over else "ok"
+            print(f"{name:<14}{medians[name] * 1000:8.1f} ms   budget {budget * 1000:6.0f} ms   {status}")
+        if loaded:
+            print(f"loaded on first render: {', '.join(loaded)}")
+        if failed:
+            print("app raised an exception on first render")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
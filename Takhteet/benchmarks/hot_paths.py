@@ -0,0 +1,278 @@
+"""Micro-benchmarks for the scheduling and PDF hot paths.
+
+Usage:
+    python benchmarks/hot_paths.py                 # compare with baselines.json
+    python benchmarks/hot_paths.py --update        # record new baselines
+    python benchmarks/hot_paths.py plan_months render_pdf --repeat 10
+
+Every benchmark runs one pass over synthetic inputs: every backward start
+surah, every daily-amount mode and plan horizons of 1 to 36 months. A pass
+is timed in --repeat samples, each looping it for at least
+MIN_SAMPLE_SECONDS, and the median time per pass counts. It is then run
+once more under tracemalloc for its peak allocation.
+
+A benchmark fails when it is slower than its baseline by more than
+--time-threshold, or allocates more than --memory-threshold above it (and
+by more than a few KiB); the exit code is then 1.
+
+baselines.json holds absolute timings from one machine. Comparing them
+with another machine is meaningless: re-record them with --update on the
+machine that runs the check (and after changing it) before relying on it.
+"""
+import argparse
+import gc
+import json
+import math
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import replace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+import holiday_calendar
+from engine import ScheduleConfig
+from pdf_export import render_pdf
+from quran_data import SURAH_DATA_BACKWARD
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+AMOUNT_MODES = engine.DAILY_AMOUNT_OPTIONS
+HORIZONS = (1, 6, 12, 36)
+WORKING_DAYS = 26
+FORWARD_STARTS = (1, 100, 250, 418, 560)
+
+# Peak-memory changes smaller than this are noise, whatever the percentage
+MEMORY_SLACK_KIB = 16
+
+# A timed sample repeats a pass until it has run at least this long, so
+# passes of a few milliseconds are not swamped by timer and scheduler noise
+MIN_SAMPLE_SECONDS = 0.2
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark; the function builds the inputs and returns the pass"""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def _backward_configs(**fields):
+    """One config per backward start surah and daily-amount mode"""
+    return [
+        ScheduleConfig(month=12, year=2025, start_page=float(surah["start_page"]),
+                       end_page=max(1, surah["start_page"] - 20), start_surah=surah["surah"],
+                       daily_amount=mode, **fields)
+        for surah in SURAH_DATA_BACKWARD
+        for mode in AMOUNT_MODES
+    ]
+
+
+def _forward_configs(**fields):
+    return [
+        ScheduleConfig(month=12, year=2025, direction=engine.DIRECTION_FORWARD, start_page=page,
+                       end_page=min(604, page + 20), daily_amount=mode, current_sipara=3, **fields)
+        for page in FORWARD_STARTS
+        for mode in AMOUNT_MODES
+    ]
+
+
+@benchmark("juzhali_window")
+def bench_juzhali():
+    # A year's backward walk from every start surah in every mode
+    days = 12 * WORKING_DAYS
+    walks = []
+    for surah in SURAH_DATA_BACKWARD:
+        for mode in AMOUNT_MODES:
+            if engine.daily_units(mode):
+                walk = engine.generate_backward_schedule(surah["surah"], surah["start_page"], mode, days)
+            else:
+                walk = engine.generate_backward_schedule_with_pattern(
+                    surah["surah"], surah["start_page"], (engine.PAGE_UNITS, engine.HALF_PAGE_UNITS), days)
+            walks.append([(day["cursor"], day["units"]) for day in walk])
+
+    def run():
+        for walk in walks:
+            window = engine.JuzhaliWindow()
+            for cursor, units in walk:
+                window.add(cursor, units)
+    return run
+
+
+@benchmark("generate_backward_schedule")
+def bench_backward_schedule():
+    cases = [(surah["surah"], surah["start_page"], mode)
+             for surah in SURAH_DATA_BACKWARD for mode in AMOUNT_MODES if engine.daily_units(mode)]
+
+    def run():
+        for surah_num, start_page, mode in cases:
+            engine.generate_backward_schedule(surah_num, start_page, mode, WORKING_DAYS)
+    return run
+
+
+@benchmark("generate_backward_schedule_with_pattern")
+def bench_backward_pattern():
+    cases = []
+    for surah in SURAH_DATA_BACKWARD:
+        for pages in (5, 13, 20, 26):
+            pattern, _ = engine.find_optimal_mix(pages, WORKING_DAYS)
+            cases.append((surah["surah"], surah["start_page"], pattern))
+
+    def run():
+        for surah_num, start_page, pattern in cases:
+            engine.generate_backward_schedule_with_pattern(surah_num, start_page, pattern, WORKING_DAYS)
+    return run
+
+
+@benchmark("get_murajjah_for_day")
+def bench_murajjah():
+    configs = [
+        ScheduleConfig(month=12, year=2025, direction=direction, current_sipara=sipara,
+                       murajjah_option=option, murajjah_cycle_days=cycle_days,
+                       manual_murajjah=(engine.sipara_mask((1, 3)), 0, engine.sipara_mask((30,))))
+        for direction in (engine.DIRECTION_BACKWARD, engine.DIRECTION_FORWARD)
+        for sipara in range(1, 31, 3)
+        for option in engine.MURAJJAH_OPTIONS
+        for cycle_days in engine.MURAJJAH_CYCLE_LENGTHS
+    ]
+    days = range(max(HORIZONS) * WORKING_DAYS)
+
+    def run():
+        for config in configs:
+            for day in days:
+                engine.get_murajjah_for_day(day, config, for_pdf=True)
+    return run
+
+
+@benchmark("plan_months")
+def bench_plan_months():
+    # Far targets, so plans run for the whole horizon (or until the surah
+    # table runs out)
+    configs = [replace(config, end_page=1) for config in _backward_configs()]
+    configs += [replace(config, end_page=604) for config in _forward_configs()]
+
+    def run():
+        for config in configs:
+            for months in HORIZONS:
+                for _ in engine.plan_months(config, months):
+                    pass
+    return run
+
+
+@benchmark("render_pdf")
+def bench_render_pdf():
+    # render_pdf is what the app's create_pdf() calls (without the cache)
+    schedules = []
+    for config in _backward_configs()[::7] + _forward_configs():
+        result = engine.calculate_schedule(config)
+        if result.ok:
+            schedules.append(result.days)
+
+    def run():
+        for days in schedules:
+            render_pdf("Student", "December", 2025, days)
+    return run
+
+
+def _clear_caches():
+    engine.clear_schedule_cache()
+    engine.auto_murajjah_rotation.cache_clear()
+    engine.manual_murajjah_rotation.cache_clear()
+    holiday_calendar.month_mask.cache_clear()
+
+
+def _time_pass(run):
+    """Seconds for one pass, starting from cold caches"""
+    _clear_caches()
+    start = time.perf_counter()
+    run()
+    return time.perf_counter() - start
+
+
+def measure(name, repeat):
+    """(median seconds per pass, peak traced allocation in KiB) for one benchmark"""
+    run = BENCHMARKS[name]()
+    run()  # warm-up: imports, fonts, first-use tables
+
+    # Like timeit, keep the collector from pausing in the middle of a sample
+    gc.disable()
+    try:
+        loops = max(1, math.ceil(MIN_SAMPLE_SECONDS / _time_pass(run)))
+        samples = [sum(_time_pass(run) for _ in range(loops)) / loops for _ in range(repeat)]
+    finally:
+        gc.enable()
+
+    _clear_caches()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(samples), peak / 1024
+
+
+def load_baselines(path=BASELINE_PATH):
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the scheduling and PDF hot paths against stored baselines")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=7, help="timed samples per benchmark, the median counts (default: 7)")
+    parser.add_argument("--time-threshold", type=float, default=0.5,
+                        help="allowed slowdown over the baseline, as a fraction (default: 0.5)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="allowed peak-memory growth over the baseline, as a fraction (default: 0.25)")
+    parser.add_argument("--update", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--baselines", default=BASELINE_PATH, help="baseline file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    baselines = load_baselines(args.baselines)
+    regressions = 0
+    results = {}
+    for name in args.names or BENCHMARKS:
+        seconds, peak_kib = measure(name, max(1, args.repeat))
+        results[name] = {"seconds": round(seconds, 6), "peak_kib": round(peak_kib, 1)}
+
+        status = ""
+        base = baselines.get(name)
+        if base and not args.update:
+            slower = seconds / base["seconds"] - 1
+            bigger = peak_kib / base["peak_kib"] - 1 if base["peak_kib"] else 0
+            problems = []
+            if slower > args.time_threshold:
+                problems.append(f"time +{slower:.0%}")
+            if bigger > args.memory_threshold and peak_kib - base["peak_kib"] > MEMORY_SLACK_KIB:
+                problems.append(f"memory +{bigger:.0%}")
+            status = f"REGRESSED ({', '.join(problems)})" if problems else f"ok ({slower:+.0%} time, {bigger:+.0%} memory)"
+            regressions += bool(problems)
+        elif not args.update:
+            status = "no baseline"
+        print(f"{name:<42}{seconds * 1000:10.2f} ms {peak_kib:10.1f} KiB   {status}")
+
+    if args.update:
+        baselines.update(results)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baselines written to {args.baselines}")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
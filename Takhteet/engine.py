@@ -0,0 +1,1174 @@
+"""Headless scheduling engine for Takhteet.
+
+Nothing in this module touches Streamlit. Every function takes its inputs as
+arguments (usually a ScheduleConfig) and reports problems as Diagnostic
+entries instead of calling st.error/st.success, so a schedule can be built
+outside a live script run - for example for a whole class at once with
+generate_many().
+"""
+import calendar
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from itertools import accumulate, cycle, islice, repeat
+
+import timing
+
+from holiday_calendar import DEFAULT_WEEKLY_OFF, HolidayRules, month_mask, weekday_names
+from quran_data import (
+    SURAH_BY_NUMBER,
+    get_surah_at_page,
+    get_next_surah_backward,
+)
+
+LINE_AMOUNTS = (5, 7, 10)
+DAILY_AMOUNT_OPTIONS = ("0.5 page daily", "1 page daily", "Mixed (0.5 & 1 page)") + tuple(
+    f"{lines} lines daily" for lines in LINE_AMOUNTS
+)
+MURAJJAH_OPTIONS = ("No Murajjah", "Manual Selection", "Auto Generate")
+DIRECTION_BACKWARD = "Backward (30 → 1)"
+DIRECTION_FORWARD = "Forward (1 → 30)"
+
+# Murajjah repeats over a cycle of working days (Day 1 .. Day 6 by default).
+# A manual selection is one 30-bit mask per cycle day: bit n-1 set means
+# sipara n is selected.
+MURAJJAH_CYCLE_DAYS = 6
+MURAJJAH_CYCLE_LENGTHS = (5, 6, 7)
+NO_MANUAL_MURAJJAH = (0,) * MURAJJAH_CYCLE_DAYS
+SIPARA_COUNT = 30
+ALL_SIPARAS_MASK = (1 << SIPARA_COUNT) - 1
+
+
+def sipara_mask(siparas):
+    """Bit mask for an iterable of sipara numbers (1-30)"""
+    mask = 0
+    for sipara in siparas:
+        if not 1 <= sipara <= SIPARA_COUNT:
+            raise ValueError(f"sipara {sipara} is not between 1 and {SIPARA_COUNT}")
+        mask |= 1 << (sipara - 1)
+    return mask
+
+
+@lru_cache(maxsize=1024)
+def mask_siparas(mask):
+    """Sorted tuple of the sipara numbers set in a mask"""
+    return tuple(n + 1 for n in range(SIPARA_COUNT) if mask >> n & 1)
+
+
+# ============ LINE CURSOR ============
+# Positions in the Mushaf are integer cursors, not float pages. A page has
+# 15 lines and a half page is 7.5 of them, so the cursor counts half lines:
+#
+#     cursor = page * PAGE_UNITS + half lines into the page
+#
+# Jadeed amounts are in the same units: HALF_PAGE_UNITS, PAGE_UNITS, or
+# line_units(n) for n lines. Pages only come back as floats for display.
+LINES_PER_PAGE = 15
+UNITS_PER_LINE = 2
+PAGE_UNITS = LINES_PER_PAGE * UNITS_PER_LINE
+HALF_PAGE_UNITS = PAGE_UNITS // 2
+
+
+def page_cursor(page):
+    """Cursor at a (possibly fractional) page number: 580.5 -> 580 * 30 + 15"""
+    return round(page * PAGE_UNITS)
+
+
+def cursor_page(cursor):
+    """Whole page a cursor is on"""
+    return cursor // PAGE_UNITS
+
+
+def cursor_position(cursor):
+    """Cursor as a page number for display (580.5 for the middle of 580)"""
+    return cursor / PAGE_UNITS
+
+
+def line_units(lines):
+    """Cursor units in a Jadeed amount of whole lines (1 to 15)"""
+    if not 1 <= lines <= LINES_PER_PAGE:
+        raise ValueError(f"a daily amount in lines must be between 1 and {LINES_PER_PAGE}, got {lines}")
+    return lines * UNITS_PER_LINE
+
+
+@lru_cache(maxsize=64)
+def daily_units(daily_amount):
+    """Cursor units of a fixed daily amount; None for the mixed mode
+
+    "0.5 page daily" is a half page, "N lines daily" is N lines and
+    anything else a full page.
+    """
+    if "Mixed" in daily_amount:
+        return None
+    if "0.5" in daily_amount:
+        return HALF_PAGE_UNITS
+    match = re.match(r"\s*(\d+)\s*lines?\b", daily_amount)
+    if match:
+        return line_units(int(match.group(1)))
+    return PAGE_UNITS
+
+
+def format_amount(units):
+    """Jadeed amount label: "full", "half" or "5 lines" """
+    if units == PAGE_UNITS:
+        return "full"
+    if units == HALF_PAGE_UNITS:
+        return "half"
+    return f"{units / UNITS_PER_LINE:g} lines"
+
+
+@dataclass(frozen=True)
+class ScheduleConfig:
+    """Everything needed to build one student's monthly schedule"""
+    month: int
+    year: int
+    direction: str = DIRECTION_BACKWARD
+    start_page: float = 580.0
+    end_page: int = 511
+    # Backward plans: surah to start in, for pages shared by several surahs
+    # (looked up from start_page when not given)
+    start_surah: int = None
+    daily_amount: str = "Mixed (0.5 & 1 page)"
+    extra_holidays: int = 4
+    murajjah_option: str = "Auto Generate"
+    current_sipara: int = 21
+    # One sipara mask per day of the murajjah cycle (see sipara_mask);
+    # missing days count as empty
+    manual_murajjah: tuple = NO_MANUAL_MURAJJAH
+    murajjah_cycle_days: int = MURAJJAH_CYCLE_DAYS
+    # Holidays besides extra_holidays (see holiday_calendar.HolidayRules)
+    weekly_off: tuple = DEFAULT_WEEKLY_OFF
+    breaks: tuple = ()
+    islamic_holidays: tuple = ()
+    hijri_offset: int = 0
+
+    @property
+    def is_backward(self):
+        return "Backward" in self.direction
+
+    @property
+    def holiday_rules(self):
+        return HolidayRules(
+            weekly_off=tuple(self.weekly_off),
+            extra_holidays=self.extra_holidays,
+            breaks=tuple(self.breaks),
+            islamic_holidays=tuple(self.islamic_holidays),
+            hijri_offset=self.hijri_offset,
+        )
+
+
+@dataclass(frozen=True)
+class Diagnostic:
+    """A message produced while scheduling
+
+    level is the name of the Streamlit call the UI uses to show it
+    ("error", "warning", "success" or "info"). surahs optionally lists
+    (surah number, name) pairs to show under the message.
+    """
+    level: str
+    message: str
+    surahs: tuple = ()
+
+
+@dataclass
+class ScheduleResult:
+    """Output of calculate_schedule: the day rows plus diagnostics"""
+    config: ScheduleConfig
+    days: list = None
+    diagnostics: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return bool(self.days)
+
+
+# ============ DAY RECORDS ============
+# A schedule is a list of DayRecord. Everything is kept as numbers and only
+# turned into text ("560 (half)", "561-570", "Para 22, Para 28") by the
+# properties below, at the UI/PDF edge.
+
+def format_page_range(bounds):
+    """(first, last) -> "first-last"; None -> "None" """
+    if bounds is None:
+        return "None"
+    return f"{bounds[0]}-{bounds[1]}"
+
+
+def forward_juzhali(current_page):
+    """Forward plans: the 10 pages before current_page"""
+    start = max(1, int(current_page - 10))
+    end = int(current_page - 1)
+    return (start, end) if start <= end else None
+
+
+OVERRIDE_JUZHALI = 1
+OVERRIDE_MURAJJAH = 2
+
+
+class DayRecord:
+    """One day of a schedule
+
+    page/units: Jadeed page and amount in cursor units (HALF_PAGE_UNITS,
+    PAGE_UNITS, or a number of lines, see line_units).
+    cursor: exact cursor the Jadeed starts at (see LINE CURSOR); None means
+    the start of page.
+    surah_num: surah of the Jadeed page (backward plans, 0 otherwise).
+    juzhali: (first, last) page of the Juzhali range, or None.
+    murajjah: tuple of sipara numbers; murajjah_note is shown when it is empty.
+    overrides: OVERRIDE_* bits for values a teacher typed in, which
+    recompute_schedule() leaves alone.
+    """
+    __slots__ = ('date', 'weekday', 'is_holiday', 'page', 'units', 'cursor', 'surah_num',
+                 'juzhali', 'murajjah', 'murajjah_note', 'overrides')
+
+    def __init__(self, date, weekday, is_holiday=False, page=0, units=0, cursor=None, surah_num=0,
+                 juzhali=None, murajjah=(), murajjah_note="", overrides=0):
+        self.date = date
+        self.weekday = weekday
+        self.is_holiday = is_holiday
+        self.page = page
+        self.units = units
+        self.cursor = cursor
+        self.surah_num = surah_num
+        self.juzhali = juzhali
+        self.murajjah = murajjah
+        self.murajjah_note = murajjah_note
+        self.overrides = overrides
+
+    @classmethod
+    def holiday(cls, date, weekday):
+        return cls(date, weekday, is_holiday=True)
+
+    def astuple(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def copy(self):
+        return DayRecord(*self.astuple())
+
+    def __eq__(self, other):
+        return isinstance(other, DayRecord) and self.astuple() == other.astuple()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"DayRecord({fields})"
+
+    # ---- formatting (UI / PDF edge) ----
+
+    @property
+    def start_cursor(self):
+        """Cursor the Jadeed starts at"""
+        return page_cursor(self.page) if self.cursor is None else self.cursor
+
+    @property
+    def amount(self):
+        """Jadeed amount in pages"""
+        return self.units / PAGE_UNITS
+
+    @property
+    def amount_text(self):
+        return format_amount(self.units)
+
+    @property
+    def day_name(self):
+        return calendar.day_abbr[self.weekday]
+
+    @property
+    def jadeed_text(self):
+        if self.is_holiday:
+            return 'OFF'
+        return f"{self.page} ({self.amount_text})"
+
+    @property
+    def juzhali_text(self):
+        return '—' if self.is_holiday else format_page_range(self.juzhali)
+
+    def murajjah_text(self, for_pdf=False):
+        if self.is_holiday:
+            return '' if for_pdf else '—'
+        return format_murajjah(self.murajjah, self.murajjah_note, for_pdf)
+
+    def to_row(self):
+        """The day as the display row the app's table shows"""
+        return {
+            'Date': self.date,
+            'Day': self.day_name,
+            'Jadeed': self.jadeed_text,
+            'Juzz Hali': self.juzhali_text,
+            'Murajjah': self.murajjah_text(),
+            'isHoliday': self.is_holiday,
+        }
+
+
+def parse_jadeed(text):
+    """"123 (full)" / "123 (half)" / "123 (5 lines)" / "123" -> (page, units); ValueError if malformed"""
+    match = re.fullmatch(r"\s*(\d+)\s*(?:\(\s*(full|half|(\d+)\s*lines?)\s*\))?\s*", text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Jadeed should look like '123 (full)', '123 (half)' or '123 (5 lines)', got {text!r}")
+    if match.group(3):
+        units = line_units(int(match.group(3)))
+    else:
+        units = HALF_PAGE_UNITS if (match.group(2) or "full").lower() == "half" else PAGE_UNITS
+    return int(match.group(1)), units
+
+
+def parse_page_range(text):
+    """"123-132" -> (123, 132); "None" or "" -> None; ValueError if malformed"""
+    if text.strip() in ("", "None", "—"):
+        return None
+    match = re.fullmatch(r"\s*(\d+)\s*-\s*(\d+)\s*", text)
+    if not match:
+        raise ValueError(f"Juzz Hali should look like '123-132' or 'None', got {text!r}")
+    return int(match.group(1)), int(match.group(2))
+
+
+def parse_murajjah(text):
+    """"Para 1, Para 2" -> ((1, 2), ""); text without numbers becomes the note"""
+    paras = tuple(int(number) for number in re.findall(r"\d+", text))
+    return (paras, "") if paras else ((), text.strip())
+
+
+class JuzhaliWindow:
+    """Running Juzhali range, fed one Jadeed day at a time
+
+    The range is 10 pages from the earliest completed page, skipping pages
+    that are started but not complete, and never past page 604 (near the
+    end the missing pages are taken after the last counted page). Before
+    any page is complete it is the 10 pages from the end of the current
+    surah. Today's work counts, so it is recorded first:
+
+        window = JuzhaliWindow()
+        window.add(580 * PAGE_UNITS, HALF_PAGE_UNITS)        # -> (581, 590)
+        window.add(580 * PAGE_UNITS + 15, HALF_PAGE_UNITS)   # -> (580, 589)
+
+    A day's units are split over every page it covers, so an amount that
+    does not divide a page (7 or 10 lines, a full page started mid-page)
+    completes each page it finishes. Only the earliest completed page and
+    the pages that are started but not yet complete are kept, so a day
+    costs the same however long the plan is.
+    """
+
+    def __init__(self):
+        self.page_totals = {}       # page -> cursor units of Jadeed done on it
+        self.partial_pages = []     # pages started but not complete, sorted
+        self.first_completed = None
+
+    def add(self, cursor, units):
+        """Record today's Jadeed (start cursor, amount in cursor units) and return the Juzhali bounds"""
+        current_page = page = cursor_page(cursor)
+        end = cursor + units
+        while cursor < end and page <= 604:
+            self._add_to_page(page, min(end, (page + 1) * PAGE_UNITS) - cursor)
+            page += 1
+            cursor = page * PAGE_UNITS
+        return self.current_bounds(current_page)
+
+    def _add_to_page(self, page, units):
+        total = self.page_totals.get(page, 0)
+        self.page_totals[page] = total + units
+        index = bisect_left(self.partial_pages, page)
+        started = index < len(self.partial_pages) and self.partial_pages[index] == page
+        if total + units >= PAGE_UNITS:
+            if started:
+                del self.partial_pages[index]
+            if self.first_completed is None or page < self.first_completed:
+                self.first_completed = page
+        elif not started and total < PAGE_UNITS:
+            self.partial_pages.insert(index, page)
+
+    def current_range(self, current_page):
+        """current_bounds() as display text ("572-581" or "None")"""
+        return format_page_range(self.current_bounds(current_page))
+
+    def current_bounds(self, current_page):
+        """(first, last) Juzhali page for a day whose Jadeed is on current_page"""
+        start = self.first_completed
+        if start is None:
+            # Nothing completed yet: 10 pages from the current surah's end
+            current_surah = get_surah_at_page(current_page)
+            if current_surah and current_surah['end_page'] <= 604:
+                surah_end = current_surah['end_page']
+                return surah_end, min(surah_end + 9, 604)
+            return None
+
+        # Every half-done page inside the window pushes its end out by one.
+        # Only the partial pages from start onward are looked at.
+        partial_pages = self.partial_pages
+        end = start + 9
+        skipped = 0
+        for index in range(bisect_left(partial_pages, start), len(partial_pages)):
+            page = partial_pages[index]
+            if page > end or page > 604:
+                break
+            end += 1
+            skipped += 1
+        if end <= 604:
+            return start, end
+
+        # Ran into the end of the Mushaf: the missing pages are made up
+        # with the pages straight after the last page that was counted
+        counted = (604 - start + 1) - skipped
+        last_counted = 604
+        index = len(partial_pages) - 1
+        while index >= 0 and partial_pages[index] == last_counted:
+            last_counted -= 1
+            index -= 1
+        return start, min(last_counted + 10 - counted, 604)
+
+
+def _walk_backward(start_surah_num, cursor, amounts, working_days):
+    """Surah-by-surah backward walk from cursor, one entry per working day
+
+    amounts yields each day's Jadeed in cursor units. A day never runs past
+    the end of its surah; once the cursor has moved into the surah's last
+    page the walk goes on at the start of the previous surah.
+    """
+    schedule = []
+    surah = SURAH_BY_NUMBER.get(start_surah_num)
+    if not surah:
+        return schedule
+    # Cursor just past the surah's last page, and at the start of it
+    surah_end = (surah["end_page"] + 1) * PAGE_UNITS
+    last_page = surah_end - PAGE_UNITS
+
+    for day, amount in zip(range(working_days), amounts):
+        while cursor >= surah_end:
+            # Move to next surah in backward sequence
+            surah = get_next_surah_backward(surah["surah"])
+            if not surah:
+                return schedule
+            cursor = surah["start_page"] * PAGE_UNITS
+            surah_end = (surah["end_page"] + 1) * PAGE_UNITS
+            last_page = surah_end - PAGE_UNITS
+
+        # Adjust amount if it exceeds what is left of the surah
+        if amount > surah_end - cursor:
+            amount = surah_end - cursor
+        schedule.append({
+            "day": day + 1,
+            "surah_num": surah["surah"],
+            "surah_name": surah["name"],
+            "page": cursor // PAGE_UNITS,
+            "cursor": cursor,
+            "units": amount,
+        })
+        cursor += amount
+
+        # If we finished the surah, move to next one
+        if cursor > last_page:
+            surah = get_next_surah_backward(surah["surah"])
+            if not surah:
+                break
+            cursor = surah["start_page"] * PAGE_UNITS
+            surah_end = (surah["end_page"] + 1) * PAGE_UNITS
+            last_page = surah_end - PAGE_UNITS
+
+    return schedule
+
+
+def generate_backward_schedule(start_surah_num, start_page, daily_amount, working_days):
+    """Generate backward schedule based on surah-by-surah progression
+
+    Each entry has the surah, the whole "page" and exact "cursor" the day
+    starts at, and its "units" of Jadeed (see LINE CURSOR).
+    """
+    units = daily_units(daily_amount) or PAGE_UNITS
+    return _walk_backward(start_surah_num, page_cursor(start_page), repeat(units), working_days)
+
+
+def generate_backward_schedule_with_pattern(start_surah_num, start_page, pattern, working_days):
+    """Generate backward schedule with custom pattern (daily amounts in cursor units)"""
+    return _walk_backward(start_surah_num, page_cursor(start_page), cycle(pattern), working_days)
+
+
+def cursor_positions(start, amounts, end, is_backward=False):
+    """Cursor each Jadeed day starts at, for a run of daily amounts
+
+    Day i starts at start -/+ sum(amounts[:i]). The running totals are
+    built in a single accumulate() pass, and every day after the first is
+    clamped to end once the target is reached.
+    """
+    offsets = list(accumulate(amounts, initial=0))[:-1]
+    if not offsets:
+        return []
+    if is_backward:
+        return [start] + [max(start - offset, end) for offset in offsets[1:]]
+    return [start] + [min(start + offset, end) for offset in offsets[1:]]
+
+
+# ============ ADAPTIVE MIXED CALCULATION ============
+# Used when no mix reaches the target: half, half, full
+_FALLBACK_MIX = (HALF_PAGE_UNITS, HALF_PAGE_UNITS, PAGE_UNITS)
+
+
+@lru_cache(maxsize=1024)
+def find_optimal_mix(total_pages, available_days):
+    """Find optimal combination of half and full pages to reach target
+
+    Returns (pattern, total_possible), where pattern is a tuple with one
+    amount per working day in cursor units (HALF_PAGE_UNITS or PAGE_UNITS)
+    and total_possible is in pages, or (None, None) when even 1 page every
+    day is not enough. Results are cached per (total_pages, available_days).
+    """
+    # If we can't even complete with all 1.0 pages
+    if available_days < total_pages:
+        return None, None  # Impossible
+
+    # Fewest full days that still reach the target:
+    #   full + 0.5 * (available - full) >= total  =>  full >= 2 * total - available
+    full_days = max(0, -((available_days * HALF_PAGE_UNITS - page_cursor(total_pages)) // HALF_PAGE_UNITS))
+    half_days = available_days - full_days
+    total_possible = (full_days * PAGE_UNITS + half_days * HALF_PAGE_UNITS) / PAGE_UNITS
+
+    if full_days == 0:
+        # All half days
+        return (HALF_PAGE_UNITS,) * available_days, total_possible
+
+    # Create pattern: distribute full days evenly among half days
+    spacing = max(1, half_days // full_days)
+    pattern = []
+    half_counter = 0
+    for _ in range(available_days):
+        if half_counter >= spacing and full_days > 0:
+            pattern.append(PAGE_UNITS)
+            full_days -= 1
+            half_counter = 0
+        elif half_days > 0:
+            pattern.append(HALF_PAGE_UNITS)
+            half_days -= 1
+            half_counter += 1
+        else:
+            pattern.append(PAGE_UNITS)
+            full_days -= 1
+
+    return tuple(pattern), total_possible
+
+
+# Shown instead of siparas when a day has none (display text, PDF text)
+MURAJJAH_TEACHER = "Teacher will assign"
+MURAJJAH_NOT_ASSIGNED = "Not assigned"
+MURAJJAH_REVISION = "Revision Day"
+_MURAJJAH_NOTE_PDF = {MURAJJAH_TEACHER: "", MURAJJAH_NOT_ASSIGNED: "", MURAJJAH_REVISION: "Revision"}
+
+
+def _check_cycle_days(cycle_days):
+    if cycle_days not in MURAJJAH_CYCLE_LENGTHS:
+        lengths = ", ".join(map(str, MURAJJAH_CYCLE_LENGTHS))
+        raise ValueError(f"murajjah cycle must be one of {lengths} days, not {cycle_days}")
+
+
+@lru_cache(maxsize=256)
+def auto_murajjah_rotation(is_backward, current_sipara, cycle_days=MURAJJAH_CYCLE_DAYS):
+    """(siparas, note) for each day of an auto-generated murajjah cycle
+
+    The completed siparas (those before current_sipara in the direction of
+    the plan) are dealt round-robin over the cycle days, so each one comes
+    up exactly once per cycle. Days left without a sipara are revision days.
+    """
+    _check_cycle_days(cycle_days)
+    if is_backward:
+        # All siparas from 30 down to (but NOT including) current_sipara
+        completed = range(current_sipara + 1, 31)
+    else:
+        # All siparas from 1 up to (but NOT including) current_sipara
+        completed = range(1, current_sipara)
+    completed = list(completed)
+    
+    rotation = []
+    for cycle_day in range(cycle_days):
+        paras = tuple(completed[cycle_day::cycle_days])
+        rotation.append((paras, "") if paras else ((), MURAJJAH_REVISION))
+    return tuple(rotation)
+
+
+@lru_cache(maxsize=256)
+def manual_murajjah_rotation(masks, cycle_days=MURAJJAH_CYCLE_DAYS):
+    """(siparas, note) for each day of a manually chosen murajjah cycle"""
+    _check_cycle_days(cycle_days)
+    rotation = []
+    for cycle_day in range(cycle_days):
+        mask = masks[cycle_day] if cycle_day < len(masks) else 0
+        rotation.append((mask_siparas(mask), "") if mask else ((), MURAJJAH_NOT_ASSIGNED))
+    return tuple(rotation)
+
+
+def murajjah_rotation(config):
+    """(siparas, note) for each day of the config's murajjah cycle
+
+    siparas is a sorted tuple of sipara numbers; note is the text shown
+    instead when it is empty ("" otherwise). Working day n of a plan gets
+    entry n % config.murajjah_cycle_days.
+    """
+    cycle_days = config.murajjah_cycle_days
+    if config.murajjah_option == "No Murajjah":
+        _check_cycle_days(cycle_days)
+        return (((), MURAJJAH_TEACHER),) * cycle_days
+    if config.murajjah_option == "Manual Selection":
+        return manual_murajjah_rotation(tuple(config.manual_murajjah), cycle_days)
+    return auto_murajjah_rotation(config.is_backward, config.current_sipara, cycle_days)
+
+
+def murajjah_for_day(day_number, config):
+    """(siparas, note) for working day day_number (see murajjah_rotation)"""
+    rotation = murajjah_rotation(config)
+    return rotation[day_number % len(rotation)]
+
+
+def format_murajjah(paras, note="", for_pdf=False):
+    """Murajjah text: "Para 1, Para 2" (display) or "1, 2" (PDF)"""
+    if paras:
+        if for_pdf:
+            return ", ".join([str(p) for p in paras])
+        return ", ".join([f"Para {p}" for p in paras])
+    return _MURAJJAH_NOTE_PDF.get(note, note) if for_pdf else note
+
+
+def get_murajjah_for_day(day_number, config, for_pdf=False):
+    """Get murajjah text for a specific day (see murajjah_for_day)"""
+    paras, note = murajjah_for_day(day_number, config)
+    return format_murajjah(paras, note, for_pdf)
+
+
+def _holiday_breakdown(config, holidays):
+    """"Sundays: 4, Breaks: 3, Extra: 4" for the schedule summary"""
+    parts = [f"{weekday_names(config.weekly_off) or 'Weekly off'}: {len(holidays.weekly_off)}"]
+    if holidays.breaks:
+        parts.append(f"Breaks: {len(holidays.breaks)}")
+    if holidays.islamic:
+        parts.append(f"Islamic holidays: {len(holidays.islamic)}")
+    parts.append(f"Extra: {config.extra_holidays}")
+    return ", ".join(parts)
+
+
+def calculate_schedule(config, carry=None):
+    """Calculate the complete schedule with CORRECTED Juzhali for backward direction
+
+    Returns a ScheduleResult. result.days is None when the target cannot be
+    reached; result.diagnostics explains why and suggests fixes.
+
+    carry is the PlanState of a multi-month plan (see plan_months). When it
+    is given the month continues from it instead of starting fresh, the
+    "reach the target this month" check is skipped, and carry is advanced
+    to the start of the following month.
+    """
+    timer = timing.timer("calculate_schedule")
+    result = ScheduleResult(config=config)
+    diagnostics = result.diagnostics
+    month = config.month
+    year = config.year
+    direction = config.direction
+    start_page = config.start_page
+    end_page = config.end_page
+    daily_amount = config.daily_amount
+    extra_holidays = config.extra_holidays
+    
+    # Holidays of this month (weekly off-days, breaks, Islamic holidays and
+    # the extra holidays at the end of the month)
+    holidays = month_mask(year, month, config.holiday_rules)
+    
+    # Calculate TOTAL PAGES NEEDED
+    total_pages_needed = abs(end_page - start_page) + 1
+    fixed_units = daily_units(daily_amount)
+    
+    # Calculate maximum available working days (no extra holidays)
+    max_working_days = holidays.max_working_days
+    
+    # Calculate current working days with user's settings
+    current_working_days = holidays.working_days
+    
+    # Calculate minimum days needed based on daily amount
+    if fixed_units is None:
+        # Use adaptive mixed calculation
+        optimal_pattern, max_possible = find_optimal_mix(total_pages_needed, current_working_days)
+        
+        if optimal_pattern:
+            # We found a pattern that works
+            min_days_needed = len(optimal_pattern)
+            avg_pages_per_day = sum(optimal_pattern) / len(optimal_pattern) / PAGE_UNITS
+            can_use_mixed = True
+        else:
+            # Try with maximum working days (reduce holidays)
+            optimal_pattern, max_possible = find_optimal_mix(total_pages_needed, max_working_days)
+            if optimal_pattern:
+                min_days_needed = len(optimal_pattern)
+                avg_pages_per_day = sum(optimal_pattern) / len(optimal_pattern) / PAGE_UNITS
+                can_use_mixed = True
+            else:
+                min_days_needed = total_pages_needed  # Need all 1.0 pages
+                avg_pages_per_day = 1.0
+                can_use_mixed = False
+    else:
+        # Fixed amount: whole days of it (2 days per page at 0.5 page daily)
+        min_days_needed = -(-page_cursor(total_pages_needed) // fixed_units)
+        avg_pages_per_day = fixed_units / PAGE_UNITS
+        # Less than a page a day can move up to the mixed pattern
+        can_use_mixed = fixed_units < PAGE_UNITS
+    
+    # CHECK: Can we reach target with current settings?
+    can_reach_target = current_working_days >= min_days_needed
+    timer.mark("feasibility")
+    
+    if not can_reach_target and carry is None:
+        # TARGET CANNOT BE REACHED! Show adaptive solutions
+        
+        diagnostics.append(Diagnostic("error", f"""
+        ❌ **TARGET CANNOT BE REACHED WITH CURRENT PLAN!**
+        
+        **Problem:**
+        - You need at least **{min_days_needed:.1f}** working days
+        - You only have **{current_working_days}** working days
+        - Shortfall: **{min_days_needed - current_working_days:.1f}** days
+        """))
+        
+        # ============ ADAPTIVE SOLUTIONS ============
+        solution_found = False
+        
+        # Solution 1: Try Mixed pattern if not already using it
+        if "Mixed" not in daily_amount and can_use_mixed:
+            optimal_pattern, max_possible = find_optimal_mix(total_pages_needed, current_working_days)
+            if optimal_pattern:
+                diagnostics.append(Diagnostic("success", f"""
+                **✅ SOLUTION: Use Adaptive Mixed Pages**
+                
+                **Action needed:**
+                - Change from **{daily_amount}** to **Mixed (0.5 & 1 page)**
+                
+                **Result:**
+                - Working days needed: **{current_working_days}** (same)
+                - Pattern: {[units / PAGE_UNITS for units in optimal_pattern[:10]]}...
+                - You can complete **{max_possible:.1f}** pages
+                """))
+                solution_found = True
+        
+        # Solution 2: Reduce holidays
+        if not solution_found and max_working_days >= min_days_needed:
+            holidays_needed = max(0, max_working_days - min_days_needed)
+            diagnostics.append(Diagnostic("success", f"""
+            **✅ SOLUTION: Reduce Holidays**
+            
+            **Action needed:**
+            - Reduce extra holidays from **{extra_holidays}** to **{holidays_needed}**
+            
+            **Result:**
+            - Working days: **{min_days_needed}** (from {current_working_days})
+            - You can complete all **{total_pages_needed}** pages
+            """))
+            solution_found = True  # <-- CORRECT INDENTATION (4 spaces)
+        
+        # Solution 3: Increase to 1 page daily (if currently on 0.5 or Mixed)
+        if not solution_found and (fixed_units is None or fixed_units < PAGE_UNITS):
+            new_min_days_1page = -(-page_cursor(total_pages_needed) // PAGE_UNITS)
+            if max_working_days >= new_min_days_1page:
+                holidays_needed = max(0, max_working_days - new_min_days_1page)
+                diagnostics.append(Diagnostic("success", f"""
+                **✅ SOLUTION: Increase to 1 Page Daily**
+                
+                **Action needed:**
+                - Change from **{daily_amount}** to **1 page daily**
+                - Set holidays to **{holidays_needed}**
+                
+                **Result:**
+                - Working days needed: **{new_min_days_1page}** (down from {min_days_needed})
+                - You can complete all **{total_pages_needed}** pages
+                """))
+                solution_found = True
+        
+        # Solution 4: Try different mixed pattern with reduced holidays
+        if not solution_found and "Mixed" in daily_amount:
+            # Try with maximum working days
+            optimal_pattern, max_possible = find_optimal_mix(total_pages_needed, max_working_days)
+            if optimal_pattern:
+                holidays_needed = 0
+                diagnostics.append(Diagnostic("success", f"""
+                **✅ SOLUTION: Use Adaptive Mixed with Reduced Holidays**
+                
+                **Action needed:**
+                - Set holidays to **{holidays_needed}**
+                - Use adaptive mixed pattern
+                
+                **Result:**
+                - Working days: **{max_working_days}** (from {current_working_days})
+                - Pattern: {[units / PAGE_UNITS for units in optimal_pattern[:10]]}...
+                - You can complete **{max_possible:.1f}** pages
+                """))
+                solution_found = True
+        
+        # FINAL CHECK - If IMPOSSIBLE even with all adjustments
+        if not solution_found:
+            # Check if it's truly impossible
+            if max_working_days < total_pages_needed:
+                diagnostics.append(Diagnostic("error", f"""
+                ⚠️ **IMPOSSIBLE TO REACH TARGET THIS MONTH!**
+                
+                **Reason:** You need {total_pages_needed} pages but only have {max_working_days} maximum working days.
+                
+                **What you CAN do:**
+                - Complete maximum of **{int(max_working_days * avg_pages_per_day)}** pages
+                - New target: **Page {start_page + int(max_working_days * avg_pages_per_day) if direction == 'Forward (1 → 30)' else start_page - int(max_working_days * avg_pages_per_day)}**
+                """))
+            else:
+                diagnostics.append(Diagnostic("error", """
+                ⚠️ **CANNOT FIND A WORKABLE SOLUTION!**
+                
+                Please try:
+                1. Reducing your target pages
+                2. Choosing a different month with more days
+                3. Reducing your extra holidays
+                """))
+            
+            return result
+        
+        diagnostics.append(Diagnostic("info", """
+        **📝 Adjust your settings according to the solution above, then click "Generate Takhteet" again.**
+        """))
+        
+        return result
+    
+    # ================ TARGET CAN BE REACHED - GENERATE SCHEDULE ================
+    
+    working_days = holidays.working_days
+    
+    # Calculate Jadeed schedule
+    is_backward = "Backward" in direction
+    total_pages = abs(end_page - start_page) + 1
+    start_cursor = carry.cursor if carry is not None else page_cursor(start_page)
+    
+    # Within a multi-month plan this month only takes its share of the
+    # target: the pages left spread over the months left (rounded up to a
+    # half page), and at most one page per working day
+    if carry is None:
+        mix_pages = total_pages
+    else:
+        mix_pages = min(-(-total_pages * 2 // carry.months_left) / 2, working_days)
+    
+    schedule = []
+    
+    if is_backward:
+        # ============ BACKWARD SURAH-BASED SCHEDULE ============
+        # Get surah for starting page (a plan remembers which surah it is in,
+        # since several surahs can share the same page)
+        if carry is not None and carry.surah_num:
+            start_surah = SURAH_BY_NUMBER.get(carry.surah_num)
+        elif config.start_surah:
+            start_surah = SURAH_BY_NUMBER.get(config.start_surah)
+        else:
+            start_surah = get_surah_at_page(start_page)
+        if not start_surah:
+            diagnostics.append(Diagnostic("error", f"❌ Page {start_page} is not in the surah database. Please check the page number."))
+            return result
+        
+        # Check if start page is valid within surah
+        if start_page < start_surah["start_page"] or start_page > start_surah["end_page"]:
+            diagnostics.append(Diagnostic("error", f"❌ Page {start_page} is not within {start_surah['name']} (pages {start_surah['start_page']}-{start_surah['end_page']})"))
+            return result
+        
+        # Generate backward schedule
+        if fixed_units is None:
+            # Use adaptive pattern
+            optimal_pattern, _ = find_optimal_mix(mix_pages, working_days)
+            if not optimal_pattern:
+                optimal_pattern = _FALLBACK_MIX  # Fallback to default
+            
+            backward_schedule = _walk_backward(
+                start_surah["surah"],
+                start_cursor,
+                cycle(optimal_pattern),
+                working_days,
+            )
+        else:
+            backward_schedule = _walk_backward(
+                start_surah["surah"],
+                start_cursor,
+                repeat(fixed_units),
+                working_days,
+            )
+        
+        # A month without working days (a break covering all of it) is
+        # all holidays, and a plan goes on from the same place next month
+        if not backward_schedule and working_days:
+            diagnostics.append(Diagnostic("error", "❌ Could not generate backward schedule. Please check your inputs."))
+            return result
+        
+        # Calculate total pages from backward schedule
+        units_scheduled = sum(item["units"] for item in backward_schedule)
+        total_pages_scheduled = units_scheduled / PAGE_UNITS
+        
+        # Check if schedule reaches target (a plan spreads it over months)
+        if units_scheduled < page_cursor(total_pages) and carry is None:
+            # Surahs that WILL be covered, listed under the note
+            surahs_covered = {}
+            for item in backward_schedule:
+                surahs_covered[item["surah_num"]] = item["surah_name"]
+            
+            # Show what we CAN achieve
+            diagnostics.append(Diagnostic("warning", f"""
+            ⚠️ **Note: With backward surah progression, you'll complete {total_pages_scheduled:.1f} pages instead of {total_pages}**
+            
+            **Reason:** Backward progression follows surah boundaries, not simple page counts.
+            
+            **Actual target reachable:** Page {cursor_position(start_cursor - units_scheduled if is_backward else start_cursor + units_scheduled)}
+            
+            **Surahs covered:**
+            """, surahs=tuple(sorted(surahs_covered.items()))))
+            
+            # Update total_pages to what's actually achievable
+            total_pages = total_pages_scheduled
+        
+        schedule = backward_schedule[:working_days]
+        
+    else:
+        # ============ FORWARD DIRECTION (ORIGINAL LOGIC WITH ADAPTIVE MIXED) ============
+        if fixed_units is None:
+            # Use adaptive pattern
+            optimal_pattern, _ = find_optimal_mix(mix_pages, working_days)
+            if not optimal_pattern:
+                optimal_pattern = _FALLBACK_MIX  # Fallback
+            
+            # Repeat pattern if needed
+            amounts = list(islice(cycle(optimal_pattern), max(0, working_days)))
+        else:
+            amounts = [fixed_units] * working_days
+        
+        for cursor, units in zip(cursor_positions(start_cursor, amounts, end_page * PAGE_UNITS), amounts):
+            schedule.append({
+                'page': cursor_page(cursor),
+                'cursor': cursor,
+                'units': units
+            })
+
+    timer.mark("jadeed")
+    
+    # ==================== CORRECTED PART: Track completed pages ====================
+    # Juzhali is tracked incrementally, one Jadeed day at a time. Each
+    # day's work is recorded first, so its range includes it.
+    juzhali = carry.juzhali if carry is not None else JuzhaliWindow()
+    if is_backward:
+        juzhali_bounds = [juzhali.add(Jadeed['cursor'], Jadeed['units']) for Jadeed in schedule]
+    else:
+        # Forward direction (unchanged)
+        juzhali_bounds = [forward_juzhali(Jadeed['page']) for Jadeed in schedule]
+    timer.mark("juzhali")
+
+    full_schedule = []
+    Jadeed_idx = 0
+    weekday_counter = carry.murajjah_day if carry is not None else 0
+    murajjah_cycle = murajjah_rotation(config)
+
+    # Get actual calendar for the selected month
+    cal = calendar.Calendar()
+    month_days = cal.itermonthdays2(year, month)  # Returns (day_of_month, weekday)
+
+    units_completed = 0
+
+    for day_num, weekday in month_days:
+        if day_num == 0:  # Skip days from other months
+            continue
+            
+        if not holidays.is_working(day_num):
+            full_schedule.append(DayRecord.holiday(day_num, weekday))
+        else:
+            if Jadeed_idx < len(schedule):
+                Jadeed = schedule[Jadeed_idx]
+                units = Jadeed['units']
+                units_completed += units
+                
+                # Murajjah siparas (or the note shown instead of them)
+                paras, note = murajjah_cycle[weekday_counter]
+                
+                # ==================== ADD TO SCHEDULE ====================
+                full_schedule.append(DayRecord(
+                    date=day_num,
+                    weekday=weekday,
+                    page=Jadeed['page'],
+                    units=units,
+                    cursor=Jadeed['cursor'],
+                    surah_num=Jadeed['surah_num'] if is_backward else 0,
+                    juzhali=juzhali_bounds[Jadeed_idx],  # ← Calculated WITH the day's work included
+                    murajjah=paras,
+                    murajjah_note=note,
+                ))
+                
+                Jadeed_idx += 1
+                weekday_counter += 1
+                if weekday_counter >= len(murajjah_cycle):
+                    weekday_counter = 0
+
+    result.days = full_schedule
+    # Murajjah assignment and building the DayRecords
+    timer.mark("days")
+    
+    if carry is not None:
+        # Hand the cursor, Juzhali and murajjah cycle on to next month
+        if Jadeed_idx:
+            last = schedule[Jadeed_idx - 1]
+            if is_backward:
+                carry.cursor, carry.surah_num = _next_backward_position(last)
+            else:
+                carry.cursor = min(last['cursor'] + last['units'], end_page * PAGE_UNITS)
+        carry.murajjah_day = weekday_counter
+        carry.units_done += units_completed
+    
+    if not working_days:
+        diagnostics.append(Diagnostic("info", f"""
+        🗓️ **No working days this month** ({_holiday_breakdown(config, holidays)}). The Jadeed continues from the same page next month.
+        """))
+        return result
+    
+    # SHOW SUCCESS SUMMARY
+    diagnostics.append(Diagnostic("success", f"""
+    ✅ **Schedule Generated Successfully!**
+    
+    📊 **Schedule Summary:**
+    - **Total Pages to Complete:** {total_pages:.1f}
+    - **Working Days:** {working_days}
+    - **Holidays:** {len(holidays.holidays)} ({_holiday_breakdown(config, holidays)})
+    - **Daily Amount:** {daily_amount}
+    - **Pages Completed:** {units_completed / PAGE_UNITS:.1f} / {total_pages:.1f}
+    - **Completion Date:** Day {working_days} of month
+    """))
+    
+    return result
+
+
+# ============ INCREMENTAL RECOMPUTE ============
+# A day's Juzhali depends only on the Jadeed days before it (and itself),
+# and its murajjah only on how many working days came before it. After a
+# teacher edits a day, only that day and the ones after it need redoing.
+
+def recompute_schedule(config, days, start_index=0, murajjah_day=0):
+    """Recompute Juzhali and murajjah from days[start_index] onward
+
+    The Juzhali window is replayed over the days before start_index; the
+    derived values of every later working day are then rebuilt from the
+    (possibly edited) Jadeed pages and holidays. Values marked in a day's
+    overrides are kept as the teacher typed them. Returns a new list; days
+    before start_index are shared with the input, later ones are copies.
+    """
+    is_backward = config.is_backward
+    juzhali = JuzhaliWindow()
+    weekday_counter = murajjah_day
+    murajjah_cycle = murajjah_rotation(config)
+    
+    for day in days[:start_index]:
+        if day.is_holiday:
+            continue
+        if is_backward:
+            juzhali.add(day.start_cursor, day.units)
+        weekday_counter = (weekday_counter + 1) % len(murajjah_cycle)
+    
+    result = list(days[:start_index])
+    for day in days[start_index:]:
+        day = day.copy()
+        result.append(day)
+        if day.is_holiday:
+            continue
+        
+        bounds = juzhali.add(day.start_cursor, day.units) if is_backward else forward_juzhali(day.page)
+        if not day.overrides & OVERRIDE_JUZHALI:
+            day.juzhali = bounds
+        if not day.overrides & OVERRIDE_MURAJJAH:
+            day.murajjah, day.murajjah_note = murajjah_cycle[weekday_counter]
+        weekday_counter = (weekday_counter + 1) % len(murajjah_cycle)
+    
+    return result
+
+
+# ============ SCHEDULE SERVICE ============
+# Streamlit reruns the whole script on every click. The schedule for a given
+# set of inputs never changes, so the UI asks for it through get_schedule(),
+# which memoizes results by the (hashable) ScheduleConfig.
+
+SCHEDULE_CACHE_SIZE = 256
+
+
+def _cache_key(config):
+    """config with inputs that cannot affect the result normalised away"""
+    if config.murajjah_option != "Manual Selection" and config.manual_murajjah != NO_MANUAL_MURAJJAH:
+        config = replace(config, manual_murajjah=NO_MANUAL_MURAJJAH)
+    return config
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def _cached_schedule(config):
+    result = calculate_schedule(config)
+    days = tuple(result.days) if result.days is not None else None
+    return days, tuple(result.diagnostics)
+
+
+def get_schedule(config):
+    """calculate_schedule(config), memoized with LRU eviction
+
+    The day rows are fresh copies on every call, so callers are free to
+    edit them (the UI's edit mode does) without touching the cache.
+    """
+    days, diagnostics = _cached_schedule(_cache_key(config))
+    if days is not None:
+        days = [day.copy() for day in days]
+    return ScheduleResult(config, days, list(diagnostics))
+
+
+def clear_schedule_cache():
+    _cached_schedule.cache_clear()
+
+
+def _next_backward_position(last_day):
+    """(cursor, surah number) the backward walk continues from after last_day
+
+    Mirrors the step at the end of _walk_backward(); returns (None, None)
+    once there are no more surahs to go to.
+    """
+    surah = SURAH_BY_NUMBER[last_day['surah_num']]
+    cursor = last_day['cursor'] + last_day['units']
+    if cursor > surah['end_page'] * PAGE_UNITS:
+        surah = get_next_surah_backward(surah['surah'])
+        if not surah:
+            return None, None
+        cursor = surah['start_page'] * PAGE_UNITS
+    return cursor, surah['surah']
+
+
+@dataclass
+class PlanState:
+    """What one month of a multi-month plan hands on to the next"""
+    cursor: int                 # where the Jadeed continues (see LINE CURSOR)
+    surah_num: int = None       # backward plans: surah the cursor is in
+    juzhali: JuzhaliWindow = field(default_factory=JuzhaliWindow)
+    murajjah_day: int = 0       # position in the murajjah cycle
+    units_done: int = 0
+    months_left: int = 1        # months of the plan from this one on
+
+
+MAX_PLAN_MONTHS = 36
+
+
+def plan_months(config, months=12):
+    """Yield one ScheduleResult per month, starting at config.month/config.year
+
+    The Jadeed page, the Juzhali history and the murajjah cycle carry over
+    from month to month, so this is one continuous plan rather than
+    separate monthly ones. Each month is yielded as soon as it is built.
+    The plan stops early once the target page is reached, when the surah
+    table runs out, or when a month cannot be scheduled.
+    """
+    if not 1 <= months <= MAX_PLAN_MONTHS:
+        raise ValueError(f"months must be between 1 and {MAX_PLAN_MONTHS}, got {months}")
+
+    total_units = page_cursor(abs(config.end_page - config.start_page) + 1)
+    carry = PlanState(cursor=page_cursor(config.start_page))
+    year, month = config.year, config.month
+    for month_index in range(months):
+        carry.months_left = months - month_index
+        month_config = replace(config, year=year, month=month, start_page=cursor_position(carry.cursor))
+        result = calculate_schedule(month_config, carry=carry)
+        yield result
+        if not result.ok or carry.cursor is None or carry.units_done >= total_units:
+            return
+        month += 1
+        if month > 12:
+            month = 1
+            year += 1
+
+
+def generate_many(configs):
+    """Build schedules for many students in one call, one ScheduleResult per config"""
+    return [calculate_schedule(config) for config in configs]
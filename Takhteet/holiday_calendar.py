@@ -0,0 +1,184 @@
+"""Working days of a month: weekly off-days, breaks and Islamic holidays.
+
+Every engine asks month_mask() which days of a month are holidays instead
+of working them out itself. The answer depends only on (year, month,
+HolidayRules), so it is computed once per combination and cached:
+
+    rules = HolidayRules(weekly_off=(calendar.FRIDAY,), extra_holidays=2,
+                         breaks=((date(2025, 12, 24), date(2025, 12, 31)),),
+                         islamic_holidays=("Eid al-Fitr",))
+    mask = month_mask(2025, 12, rules)
+    mask.working_days, mask.is_working(5)
+
+Islamic holidays are found offline with the tabular (arithmetical) Hijri
+calendar. It can be a day or two away from the dates announced after the
+moon sighting, which hijri_offset corrects.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+from functools import lru_cache
+
+DEFAULT_WEEKLY_OFF = (calendar.SUNDAY,)
+
+# Hijri (month, day) of each holiday
+ISLAMIC_HOLIDAYS = {
+    "Islamic New Year": ((1, 1),),
+    "Ashura": ((1, 10),),
+    "Eid al-Fitr": ((10, 1), (10, 2), (10, 3)),
+    "Day of Arafah": ((12, 9),),
+    "Eid al-Adha": ((12, 10), (12, 11), (12, 12), (12, 13)),
+}
+MAX_HIJRI_OFFSET = 2
+
+# ============ HIJRI CALENDAR ============
+# Tabular Islamic calendar, civil epoch (1 Muharram 1 AH = 16 July 622
+# Julian): 30-year cycles with 11 leap years, months alternating 30 and 29
+# days. Dates are proleptic Gregorian ordinals, as date.toordinal().
+_HIJRI_EPOCH = date(622, 7, 19).toordinal()
+
+
+def _ordinal_from_hijri(year, month, day):
+    return (_HIJRI_EPOCH - 1 + (year - 1) * 354 + (3 + 11 * year) // 30
+            + 29 * (month - 1) + month // 2 + day)
+
+
+def hijri_from_date(day):
+    """(year, month, day) of the tabular Hijri date of a datetime.date"""
+    ordinal = day.toordinal()
+    year = (30 * (ordinal - _HIJRI_EPOCH) + 10646) // 10631
+    month = (11 * (ordinal - _ordinal_from_hijri(year, 1, 1)) + 330) // 325
+    return year, month, ordinal - _ordinal_from_hijri(year, month, 1) + 1
+
+
+def date_from_hijri(year, month, day):
+    """datetime.date of a tabular Hijri date"""
+    return date.fromordinal(_ordinal_from_hijri(year, month, day))
+
+
+# ============ RULES AND MASKS ============
+
+@dataclass(frozen=True)
+class HolidayRules:
+    """Which days of a month are off
+
+    weekly_off: weekdays off every week (calendar.MONDAY = 0 .. SUNDAY = 6).
+    extra_holidays: the last N days of the month are off as well (days that
+    are already off count towards N).
+    breaks: (first, last) datetime.date ranges, both ends included.
+    islamic_holidays: names from ISLAMIC_HOLIDAYS.
+    hijri_offset: days added to the tabular Hijri dates (-2 to 2).
+    """
+    weekly_off: tuple = DEFAULT_WEEKLY_OFF
+    extra_holidays: int = 4
+    breaks: tuple = ()
+    islamic_holidays: tuple = ()
+    hijri_offset: int = 0
+
+    def __post_init__(self):
+        if any(not 0 <= weekday <= 6 for weekday in self.weekly_off):
+            raise ValueError(f"weekly off-days must be weekday numbers 0-6, got {self.weekly_off}")
+        if len(set(self.weekly_off)) == 7:
+            raise ValueError("every day of the week is off")
+        if self.extra_holidays < 0:
+            raise ValueError(f"extra_holidays cannot be negative, got {self.extra_holidays}")
+        for first, last in self.breaks:
+            if last < first:
+                raise ValueError(f"break ends ({last}) before it starts ({first})")
+        unknown = [name for name in self.islamic_holidays if name not in ISLAMIC_HOLIDAYS]
+        if unknown:
+            raise ValueError(f"unknown Islamic holiday(s): {', '.join(unknown)}")
+        if not -MAX_HIJRI_OFFSET <= self.hijri_offset <= MAX_HIJRI_OFFSET:
+            raise ValueError(f"hijri_offset must be between -{MAX_HIJRI_OFFSET} and {MAX_HIJRI_OFFSET}")
+
+
+@dataclass(frozen=True)
+class MonthMask:
+    """Holidays of one month, as sorted tuples of day numbers
+
+    A day is listed under the first reason that applies, in the order
+    weekly_off, breaks, islamic, extra; holidays has all of them. mask has
+    bit d-1 set when day d is a working day.
+    """
+    year: int
+    month: int
+    days_in_month: int
+    weekly_off: tuple
+    breaks: tuple
+    islamic: tuple
+    extra: tuple
+    holidays: tuple
+    mask: int
+
+    @property
+    def fixed_holidays(self):
+        """Holidays that remain with no extra holidays at all"""
+        return len(self.weekly_off) + len(self.breaks) + len(self.islamic)
+
+    @property
+    def working_days(self):
+        return self.days_in_month - len(self.holidays)
+
+    @property
+    def max_working_days(self):
+        """Working days with no extra holidays"""
+        return self.days_in_month - self.fixed_holidays
+
+    def is_working(self, day):
+        return bool(self.mask >> (day - 1) & 1)
+
+
+def islamic_holiday_days(year, month, names, hijri_offset=0):
+    """Days of a Gregorian month that fall on the named Islamic holidays"""
+    wanted = {hijri_day for name in names for hijri_day in ISLAMIC_HOLIDAYS[name]}
+    if not wanted:
+        return ()
+    first = date(year, month, 1)
+    days_in_month = calendar.monthrange(year, month)[1]
+    shift = timedelta(days=hijri_offset)
+    return tuple(
+        day for day in range(1, days_in_month + 1)
+        if hijri_from_date(first + timedelta(days=day - 1) - shift)[1:] in wanted
+    )
+
+
+@lru_cache(maxsize=512)
+def month_mask(year, month, rules=HolidayRules()):
+    """MonthMask for a month under the given HolidayRules (cached)"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    off = set()
+
+    first_weekday = calendar.monthrange(year, month)[0]
+    weekly_off = tuple(day for day in range(1, days_in_month + 1)
+                       if (first_weekday + day - 1) % 7 in rules.weekly_off)
+    off.update(weekly_off)
+
+    month_start = date(year, month, 1)
+    month_end = date(year, month, days_in_month)
+    breaks = set()
+    for first, last in rules.breaks:
+        first, last = max(first, month_start), min(last, month_end)
+        breaks.update(range(first.day, last.day + 1) if first <= last else ())
+    breaks = tuple(sorted(breaks - off))
+    off.update(breaks)
+
+    islamic = tuple(day for day in islamic_holiday_days(year, month, rules.islamic_holidays, rules.hijri_offset)
+                    if day not in off)
+    off.update(islamic)
+
+    # The last N days of the month, skipping those already off
+    extra = tuple(day for day in range(days_in_month, max(0, days_in_month - rules.extra_holidays), -1)
+                  if day not in off)
+    off.update(extra)
+
+    mask = 0
+    for day in range(1, days_in_month + 1):
+        if day not in off:
+            mask |= 1 << (day - 1)
+    return MonthMask(year, month, days_in_month, weekly_off, breaks, islamic, tuple(sorted(extra)),
+                     tuple(sorted(off)), mask)
+
+
+def weekday_names(weekdays):
+    """"Sundays", "Fridays/Saturdays" for a tuple of weekday numbers"""
+    return "/".join(f"{calendar.day_name[weekday]}s" for weekday in sorted(weekdays))
@@ -0,0 +1,345 @@
+"""PDF export for Takhteet schedules.
+
+Builds the portrait monthly plan (15 days per page) from the DayRecords that
+engine.calculate_schedule() returns. Nothing here depends on Streamlit, so
+the same code serves the app's download button and bulk exports.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+
+from fpdf import FPDF
+from pdf_fonts import ARABIC_FAMILY, get_font_registry
+from text_fit import text_fitter
+import timing
+try:
+    from arabic_reshaper import reshape
+    from bidi.algorithm import get_display
+    ARABIC_SUPPORT = True
+except:
+    ARABIC_SUPPORT = False
+
+
+# Matches any character in the Arabic block
+ARABIC_TEXT = re.compile('[\u0600-\u06FF]')
+
+
+@lru_cache(maxsize=4096)
+def _shape_arabic(text):
+    try:
+        reshaped_text = reshape(text)
+        return get_display(reshaped_text)
+    except:
+        return text
+
+def format_arabic(text):
+    """Format Arabic text for RTL display"""
+    if ARABIC_SUPPORT and isinstance(text, str) and ARABIC_TEXT.search(text):
+        return _shape_arabic(text)
+    return text
+
+# Fixed Arabic labels of the PDF, shaped once when the module loads
+ARABIC_TITLE = format_arabic("تخطيط شهري")
+ARABIC_HOLIDAY = format_arabic("عطلة")
+ARABIC_HEADERS = tuple(format_arabic(text) for text in (
+    "ملاحظات",          # Notes
+    "هدف حاصل كيڈو؟",   # Target Achieved?
+    "المراجعة",         # Murajaah
+    "جز حالی",          # Juzz Hali
+    "الجديد",           # New Page (simplified)
+    "كمية",             # Amount (simplified)
+    "التاريخ",          # Date
+))
+
+# ============ PAGE TEMPLATE ============
+# The table layout of the portrait page never changes between students:
+# only the title and the per-day texts do. Its geometry is computed once per
+# page shape and drawn with plain rectangles and lines; the texts are then
+# placed on top without going through pdf.cell().
+
+# FULL PAGE COLUMN WIDTHS - Adjusted to use maximum space
+TABLE_WIDTH = 185  # Slightly reduced to prevent overflow
+TABLE_X = (210 - TABLE_WIDTH) / 2  # Center the table on page
+HEADER_HEIGHT = 8
+
+# OPTIMIZED COLUMN WIDTHS FOR FULL PAGE (column 0 is the rightmost, RTL)
+COL_WIDTHS = (
+    TABLE_WIDTH * 0.25,   # Notes - 25%
+    TABLE_WIDTH * 0.16,   # Target Achieved? - 16%
+    TABLE_WIDTH * 0.16,   # Murajaah - 16%
+    TABLE_WIDTH * 0.12,   # Juzz Hali - 12%
+    TABLE_WIDTH * 0.10,   # New Page - 10% (reduced)
+    TABLE_WIDTH * 0.11,   # Amount - 11%
+    TABLE_WIDTH * 0.10,   # Date - 10%
+)
+# Room for the cell text: 2mm padding on each side
+TEXT_WIDTHS = tuple(width - 4 for width in COL_WIDTHS)
+HEADER_ALIGN = ('C',) * 7
+ROW_ALIGN = ('L', 'C', 'C', 'C', 'C', 'C', 'R')  # Notes left, Date right
+
+ENGLISH_HEADERS = (
+    "Notes",
+    "Target Achieved?",
+    "Murajaah",
+    "Juzz Hali",
+    "New Page",
+    "Amount",
+    "Date",
+)
+
+CELL_MARGIN = 1  # FPDF's default cell margin (mm)
+
+
+@dataclass(frozen=True)
+class PageTemplate:
+    header_y: float
+    row_height: float
+    row_y: tuple
+    col_x: tuple   # left edge of each column
+    grid: tuple    # border segments (x1, y1, x2, y2)
+
+
+@lru_cache(maxsize=32)
+def page_template(header_y, rows):
+    """Geometry of the table for a page whose header starts at header_y"""
+    # ===== DYNAMIC ROW HEIGHT CALCULATION =====
+    # Calculate available height after headers and before footer
+    available_height = 270 - (header_y + HEADER_HEIGHT) - 25  # Subtract footer space (25mm)
+    if rows > 0:
+        # Keep row height between 7-10mm for readability
+        row_height = min(10, max(7, available_height / rows))
+    else:
+        row_height = 8.5  # Default if no data
+    
+    first_row_y = header_y + HEADER_HEIGHT
+    row_y = tuple(first_row_y + r * row_height for r in range(rows))
+    bottom = first_row_y + rows * row_height
+    
+    # Columns are written right to left, so column 6 (Date) is at TABLE_X
+    col_x = tuple(TABLE_X + sum(COL_WIDTHS[i + 1:]) for i in range(7))
+    
+    horizontal = [header_y, first_row_y] + [y + row_height for y in row_y]
+    vertical = [TABLE_X] + [x + COL_WIDTHS[i] for i, x in enumerate(col_x)]
+    grid = tuple(
+        [(TABLE_X, y, TABLE_X + TABLE_WIDTH, y) for y in horizontal]
+        + [(x, header_y, x, bottom) for x in sorted(vertical)]
+    )
+    return PageTemplate(header_y, row_height, row_y, col_x, grid)
+
+
+def place_row_text(pdf, layout, y, height, texts, aligns, fitter):
+    """Write one row of cell texts, positioned the way pdf.cell() would"""
+    baseline = y + 0.5 * height + 0.3 * pdf.font_size
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        x = layout.col_x[i]
+        if aligns[i] == 'L':
+            x += CELL_MARGIN
+        else:
+            width = fitter.width(text)
+            if aligns[i] == 'R':
+                x += COL_WIDTHS[i] - CELL_MARGIN - width
+            else:
+                x += (COL_WIDTHS[i] - width) / 2
+        pdf.text(x, baseline, text)
+
+
+def row_cells(day, use_arabic):
+    """Texts of one DayRecord, column 0 (Notes) to column 6 (Date)"""
+    if day.is_holiday:
+        return [
+            "",  # Notes
+            "",  # Target
+            ARABIC_HOLIDAY if use_arabic else "Holiday",  # Murajaah
+            "",  # Juzz Hali
+            "",  # New Page
+            "",  # Amount
+            str(day.date)  # Date
+        ]
+    
+    # Murajjah without the "Para" prefix, or the note shown instead
+    murajjah = ", ".join(map(str, day.murajjah)) if day.murajjah else day.murajjah_note
+    
+    return [
+        "",  # Notes
+        "",  # Target
+        murajjah,  # Murajaah
+        f"{day.juzhali[0]}-{day.juzhali[1]}" if day.juzhali else "",  # Juzz Hali
+        str(day.page),  # New Page
+        day.amount_text.capitalize(),  # Amount
+        str(day.date)  # Date
+    ]
+
+def render_pdf(student_name, month_name, year, schedule_data):
+    """Render a list of DayRecord to PDF bytes (PORTRAIT, 15 days per page)"""
+    timer = timing.timer("render_pdf")
+    # Create PDF in PORTRAIT mode
+    pdf = FPDF(orientation='P')
+    pdf.set_auto_page_break(auto=False)  # Manual page breaks
+    
+    # Bundled Arabic fonts, parsed once per process
+    use_arabic = ARABIC_SUPPORT and get_font_registry().install(pdf)
+    timer.mark("fonts")
+    
+    # Split into two pages: days 1-15 and days 16-31
+    first_half = [d for d in schedule_data if d.date <= 15]
+    second_half = [d for d in schedule_data if d.date > 15]
+    
+    # Page 1: Days 1-15
+    pdf.add_page()
+    draw_pdf_page(pdf, student_name, month_name, year, first_half, use_arabic, page_num=1)
+    
+    # Page 2: Days 16-31
+    if second_half:
+        pdf.add_page()
+        draw_pdf_page(pdf, student_name, month_name, year, second_half, use_arabic, page_num=2)
+    timer.mark("layout")
+    
+    # Return PDF as bytes
+    pdf_output = pdf.output()
+    timer.mark("output")
+    
+    if isinstance(pdf_output, bytearray):
+        return bytes(pdf_output)
+    elif isinstance(pdf_output, str):
+        return pdf_output.encode('latin-1')
+    else:
+        return pdf_output
+
+def draw_pdf_page(pdf, student_name, month_name, year, days_data, use_arabic, page_num):
+    """Draw a single page of the PDF with 15 days - FULL PAGE WIDTH"""
+    
+    # Title - Handle long student names by auto-adjusting font size
+    title = f"{student_name} - {month_name} {year}"
+    pdf.set_font('Helvetica', 'B', 16)
+    
+    # Check if title is too long and reduce font size if needed
+    title_width = pdf.get_string_width(title)
+    max_title_width = 190  # Maximum width for title
+    
+    if title_width > max_title_width:
+        # Reduce font size proportionally
+        new_font_size = 16 * (max_title_width / title_width)
+        new_font_size = max(12, new_font_size)  # Don't go below 12pt
+        pdf.set_font('Helvetica', 'B', new_font_size)
+    
+    pdf.cell(0, 10, title, 0, 1, 'C')
+    pdf.ln(3)
+    
+    # Add "Monthly Plan" subtitle
+    if use_arabic:
+        pdf.set_font(ARABIC_FAMILY, 'B', 14)
+        arabic_title = ARABIC_TITLE
+        pdf.cell(0, 10, arabic_title, 0, 1, 'C')
+    else:
+        pdf.set_font('Helvetica', 'B', 14)
+        pdf.cell(0, 10, "Monthly Plan", 0, 1, 'C')
+    
+    # Add page indicator
+    pdf.set_font('Helvetica', 'I', 10)
+    if len(days_data) > 0:
+        start_day = days_data[0].date
+        end_day = days_data[-1].date
+        pdf.cell(0, 8, f"Days {start_day}-{end_day}", 0, 1, 'C')
+    pdf.ln(5)
+    
+    # Fixed layout (column edges, row positions, grid), computed once per shape
+    layout = page_template(round(pdf.get_y(), 3), len(days_data))
+    headers = ARABIC_HEADERS if use_arabic else ENGLISH_HEADERS
+    font_family = ARABIC_FAMILY if use_arabic else 'Helvetica'
+    
+    # Backgrounds first: header band (SLIGHTLY MORE BLUE) and holiday rows (light gray)
+    pdf.set_fill_color(153, 204, 255)
+    pdf.rect(TABLE_X, layout.header_y, TABLE_WIDTH, HEADER_HEIGHT, 'F')
+    pdf.set_fill_color(235, 235, 235)
+    for row_y, day_schedule in zip(layout.row_y, days_data):
+        if day_schedule.is_holiday:
+            pdf.rect(TABLE_X, row_y, TABLE_WIDTH, layout.row_height, 'F')
+    
+    # Borders - DARKER BLACK, slightly thicker
+    pdf.set_draw_color(50, 50, 50)
+    pdf.set_line_width(0.35)
+    for x1, y1, x2, y2 in layout.grid:
+        pdf.line(x1, y1, x2, y2)
+    
+    # Cell texts on top - BLACK TEXT
+    pdf.set_text_color(0, 0, 0)
+    pdf.set_font(font_family, 'B', 9)
+    place_row_text(pdf, layout, layout.header_y, HEADER_HEIGHT, headers, HEADER_ALIGN, text_fitter(pdf))
+    
+    pdf.set_font(font_family, '', 8)
+    fitter = text_fitter(pdf)
+    for row_y, day_schedule in zip(layout.row_y, days_data):
+        cell_data = row_cells(day_schedule, use_arabic)
+        
+        # Format Arabic if needed
+        if use_arabic:
+            cell_data = [_shape_arabic(text) if ARABIC_TEXT.search(text) else text for text in cell_data]
+        
+        # Ensure text fits in cell - but only truncate if really necessary
+        cell_data = fitter.fit_row(cell_data, TEXT_WIDTHS)
+        place_row_text(pdf, layout, row_y, layout.row_height, cell_data, ROW_ALIGN, fitter)
+    
+    # Footer note
+    pdf.set_y(275)
+    
+    # Footer with black text
+    pdf.set_font('Helvetica', 'I', 8)
+    pdf.set_text_color(0, 0, 0)  # Black text
+    pdf.cell(0, 8, "Note: Right columns for student, left for teacher", 0, 0, 'C')
+    
+    # Add page number at bottom right
+    pdf.set_font('Helvetica', 'I', 9)
+    pdf.set_xy(170, 282)
+    pdf.cell(20, 5, f"Page {page_num}", 0, 0, 'R')
+
+
+# ============ RENDERED PDF CACHE ============
+# Streamlit reruns the script on every click while a schedule is shown, and
+# this module is imported once per server process, so the cache below is
+# shared by all sessions: an identical plan is only rendered once.
+
+PDF_CACHE_SIZE = 64
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+
+def pdf_cache_key(student_name, month_name, year, schedule_data):
+    """Content hash of everything that ends up in the PDF"""
+    payload = json.dumps(
+        [student_name, month_name, year, [day.astuple() for day in schedule_data]],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_pdf_cached(student_name, month_name, year, schedule_data):
+    """render_pdf() through a bounded, process-wide LRU cache"""
+    key = pdf_cache_key(student_name, month_name, year, schedule_data)
+    with _pdf_cache_lock:
+        pdf_bytes = _pdf_cache.get(key)
+        if pdf_bytes is not None:
+            _pdf_cache.move_to_end(key)
+            return pdf_bytes
+
+    # Render outside the lock so other sessions are not held up
+    pdf_bytes = render_pdf(student_name, month_name, year, schedule_data)
+
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf_bytes
+        _pdf_cache.move_to_end(key)
+        while len(_pdf_cache) > PDF_CACHE_SIZE:
+            _pdf_cache.popitem(last=False)
+    return pdf_bytes
+
+
+def clear_pdf_cache():
+    """Drop every cached PDF"""
+    with _pdf_cache_lock:
+        _pdf_cache.clear()
@@ -0,0 +1,143 @@
+"""Process-wide font registry for the PDF export.
+
+The Arabic font files ship in fonts/ next to this module. They are located,
+parsed and checked once per process; every new FPDF document then gets its
+own lightweight copy of the already-parsed fonts instead of parsing the TTF
+files again with add_font().
+
+The copy is built from fpdf2's font internals (tested with fpdf2 2.8.x, see
+requirements.txt). When they are not what this module expects, documents
+get the fonts through the public add_font() instead, which is slower but
+gives the same PDF.
+"""
+import copy
+import os
+import threading
+import warnings
+from io import BytesIO
+
+from fontTools.ttLib import TTFont
+from fpdf import FPDF
+
+try:
+    from fpdf.fonts import SubsetMap
+except ImportError:
+    # Older fpdf2 kept it in fpdf.fpdf, with fonts as plain dicts
+    SubsetMap = None
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# Family used for the Arabic headers and cells. DejaVu Sans also covers
+# Latin and digits, which appear in the same cells ("Para 27", page numbers).
+# The bundled files are cut down to what the PDF can contain, which keeps
+# parsing and per-document subsetting cheap:
+#   pyftsubset DejaVuSans.ttf --layout-features='*' --glyph-names \
+#       --unicodes=U+0020-007E,U+00A0-00FF,U+0600-06FF,U+FB50-FDFF,U+FE70-FEFF,U+2010-2027,U+2192
+ARABIC_FAMILY = "Arabic"
+FONT_FILES = {
+    "": "DejaVuSans.ttf",
+    "B": "DejaVuSans-Bold.ttf",
+}
+
+# Characters the PDF needs from these fonts: Latin/digits, the Arabic letters
+# and the presentation forms produced by arabic_reshaper.
+REQUIRED_CHARS = (
+    [ord(c) for c in "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz -()."]
+    + list(range(0x0621, 0x063B))
+    + list(range(0x0641, 0x064B))
+    + list(range(0xFE80, 0xFEF5))
+)
+
+
+class FontRegistryError(Exception):
+    pass
+
+
+class _LoadedFont:
+    """One parsed font file: the raw bytes plus a template TTFFont"""
+
+    def __init__(self, path, style):
+        self.path = path
+        with open(path, "rb") as f:
+            self.data = f.read()
+
+        cmap = TTFont(BytesIO(self.data), lazy=True).getBestCmap() or {}
+        missing = [c for c in REQUIRED_CHARS if c not in cmap]
+        if missing:
+            sample = "".join(chr(c) for c in missing[:10])
+            raise FontRegistryError(
+                f"{os.path.basename(path)} is missing {len(missing)} required glyphs ({sample}...)"
+            )
+
+        scratch = FPDF()
+        scratch.add_font(ARABIC_FAMILY, style, path)
+        self.template = scratch.fonts[f"{ARABIC_FAMILY.lower()}{style}"]
+        # Whether copy_for() can share the parsed template with documents
+        self.shareable = SubsetMap is not None and all(
+            hasattr(self.template, name) for name in ("i", "desc", "ttfont", "subset")
+        )
+
+    def copy_for(self, pdf):
+        """Per-document copy sharing the parsed, read-only tables
+
+        Width tables, cmap and glyph ids are never modified after parsing.
+        The fontTools object is subset in place when the PDF is written and
+        the descriptor gets the document's object ids, so those two (plus
+        the subset map) are private to each document.
+        """
+        font = copy.copy(self.template)
+        font.i = len(pdf.fonts) + 1
+        font.ttfont = TTFont(BytesIO(self.data), recalcTimestamp=False, lazy=True)
+        font.desc = copy.copy(self.template.desc)
+        font.subset = SubsetMap(font)
+        font.missing_glyphs = []
+        font.biggest_size_pt = 0
+        return font
+
+
+class FontRegistry:
+    """Locates, parses and validates the bundled fonts once"""
+
+    def __init__(self, font_dir=FONT_DIR, font_files=FONT_FILES):
+        self.fonts = {}
+        self.error = None
+        try:
+            for style, file_name in font_files.items():
+                path = os.path.join(font_dir, file_name)
+                if not os.path.isfile(path):
+                    raise FontRegistryError(f"font file not found: {path}")
+                self.fonts[style] = _LoadedFont(path, style)
+        except Exception as e:
+            self.fonts = {}
+            self.error = str(e)
+            warnings.warn(f"Arabic PDF fonts unavailable, falling back to Helvetica: {e}")
+
+    @property
+    def available(self):
+        return bool(self.fonts)
+
+    def install(self, pdf):
+        """Register every bundled font on a fresh FPDF document"""
+        for style, loaded in self.fonts.items():
+            fontkey = f"{ARABIC_FAMILY.lower()}{style}"
+            if fontkey in pdf.fonts:
+                continue
+            if loaded.shareable:
+                pdf.fonts[fontkey] = loaded.copy_for(pdf)
+            else:
+                pdf.add_font(ARABIC_FAMILY, style, loaded.path)
+        return self.available
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_font_registry():
+    """The process-wide registry, loaded on first use"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = FontRegistry()
+    return _registry
@@ -0,0 +1,179 @@
+"""Surah, page and juz metadata shared by the app and the scheduling code.
+
+The Mushaf table (all 114 surahs, per-page ayah ranges and the juz, hizb and
+rub' starts) is packed in data/mushaf.bin, built by
+tools/build_mushaf_data.py. The file is memory-mapped when this module is
+first imported and read through the accessors below; only the surah records
+and the page lookup tables are unpacked up front. Streamlit re-executes
+``app.py`` on every rerun, but imported modules stay cached in
+``sys.modules``, so none of this is redone per interaction.
+"""
+import mmap
+import os
+import struct
+from bisect import bisect_right
+from types import MappingProxyType
+
+TOTAL_PAGES = 604
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "mushaf.bin")
+
+# Record layouts, see tools/build_mushaf_data.py
+_MAGIC = b"TKMD"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHHHHHH")
+_SURAH = struct.Struct("<HHHHHBHB")
+_PAGE = struct.Struct("<BHBH")
+_RUB = struct.Struct("<HBH")
+
+
+def _map_data(path):
+    with open(path, "rb") as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+_DATA = _map_data(DATA_PATH)
+_magic, _version, SURAH_COUNT, _page_count, JUZ_COUNT, HIZB_COUNT, RUB_COUNT = _HEADER.unpack_from(_DATA)
+if _magic != _MAGIC or _version != _VERSION or _page_count != TOTAL_PAGES:
+    raise RuntimeError(f"{DATA_PATH} is not a version {_VERSION} Mushaf table")
+
+_SURAHS_AT = _HEADER.size
+_PAGES_AT = _SURAHS_AT + SURAH_COUNT * _SURAH.size
+_RUBS_AT = _PAGES_AT + TOTAL_PAGES * _PAGE.size
+_STRINGS_AT = _RUBS_AT + RUB_COUNT * _RUB.size
+
+
+def _string(offset, length):
+    start = _STRINGS_AT + offset
+    return _DATA[start:start + length].decode("utf-8")
+
+
+def _surah_record(number):
+    start_page, end_page, ayah_count, _, name_at, name_len, arabic_at, arabic_len = _SURAH.unpack_from(
+        _DATA, _SURAHS_AT + (number - 1) * _SURAH.size
+    )
+    return MappingProxyType({
+        "surah": number,
+        "name": _string(name_at, name_len),
+        "arabic": _string(arabic_at, arabic_len),
+        "start_page": start_page,
+        "end_page": end_page,
+        "ayah_count": ayah_count,
+    })
+
+
+# ================ SURAH DATABASE FOR BACKWARD HIFZ ================
+# Madinah Mushaf page numbering (604 pages), as in the Mushaf Tajweed
+# Dar Al-Maarifah Damascus. Surahs in BACKWARD order (from An-Nas to
+# Al-Fatihah); immutable records read with record["name"],
+# record["start_page"], ...
+SURAH_DATA_BACKWARD = tuple(_surah_record(number) for number in range(SURAH_COUNT, 0, -1))
+
+# Create lookup dictionaries for easy access
+SURAH_BY_NUMBER = MappingProxyType({s["surah"]: s for s in SURAH_DATA_BACKWARD})
+SURAH_BY_NAME = MappingProxyType({s["name"]: s for s in SURAH_DATA_BACKWARD})
+
+# Position of each surah in SURAH_DATA_BACKWARD, for neighbour lookups
+_BACKWARD_POSITION = {s["surah"]: i for i, s in enumerate(SURAH_DATA_BACKWARD)}
+
+
+def _build_page_index(contains):
+    """Map every page 0..604 to the first surah (in backward order) that contains it"""
+    index = [None] * (TOTAL_PAGES + 1)
+    for surah in SURAH_DATA_BACKWARD:
+        for page in range(surah["start_page"], surah["end_page"] + 1):
+            if index[page] is None and contains(surah, page):
+                index[page] = surah
+    return tuple(index)
+
+
+# A whole page P belongs to a surah when start <= P <= end. A fractional
+# position such as 580.5 sits strictly inside page 580, so it only belongs to
+# surahs that continue past that page (start <= 580 < end).
+_SURAH_AT_PAGE = _build_page_index(lambda s, p: True)
+_SURAH_WITHIN_PAGE = _build_page_index(lambda s, p: p < s["end_page"])
+
+
+def get_surah_at_page(page):
+    """Find which surah contains a given page"""
+    whole = int(page)
+    if whole < 0 or whole > TOTAL_PAGES:
+        return None
+    if page == whole:
+        return _SURAH_AT_PAGE[whole]
+    return _SURAH_WITHIN_PAGE[whole]
+
+
+def get_next_surah_backward(current_surah_num):
+    """Get the next surah in backward sequence (previous surah number)"""
+    i = _BACKWARD_POSITION.get(current_surah_num)
+    if i is not None and i + 1 < len(SURAH_DATA_BACKWARD):
+        return SURAH_DATA_BACKWARD[i + 1]
+    return None
+
+
+def get_previous_surah_backward(current_surah_num):
+    """Get the previous surah in backward sequence (next surah number - going forward)"""
+    i = _BACKWARD_POSITION.get(current_surah_num)
+    if i is not None and i - 1 >= 0:
+        return SURAH_DATA_BACKWARD[i - 1]
+    return None
+
+
+# ================ PAGES, JUZ, HIZB AND RUB' ================
+
+def page_ayah_range(page):
+    """((surah, ayah), (surah, ayah)) of the first and last ayah on a page"""
+    if not 1 <= page <= TOTAL_PAGES:
+        raise ValueError(f"page must be between 1 and {TOTAL_PAGES}, got {page}")
+    first_surah, first_ayah, last_surah, last_ayah = _PAGE.unpack_from(
+        _DATA, _PAGES_AT + (page - 1) * _PAGE.size
+    )
+    return (first_surah, first_ayah), (last_surah, last_ayah)
+
+
+def rub_start(rub):
+    """(page, surah, ayah) where rub' (quarter hizb) 1-240 starts"""
+    if not 1 <= rub <= RUB_COUNT:
+        raise ValueError(f"rub' must be between 1 and {RUB_COUNT}, got {rub}")
+    return _RUB.unpack_from(_DATA, _RUBS_AT + (rub - 1) * _RUB.size)
+
+
+def hizb_start(hizb):
+    """(page, surah, ayah) where hizb 1-60 starts"""
+    if not 1 <= hizb <= HIZB_COUNT:
+        raise ValueError(f"hizb must be between 1 and {HIZB_COUNT}, got {hizb}")
+    return rub_start((hizb - 1) * (RUB_COUNT // HIZB_COUNT) + 1)
+
+
+def juz_start(juz):
+    """(page, surah, ayah) where juz (sipara) 1-30 starts"""
+    if not 1 <= juz <= JUZ_COUNT:
+        raise ValueError(f"juz must be between 1 and {JUZ_COUNT}, got {juz}")
+    return rub_start((juz - 1) * (RUB_COUNT // JUZ_COUNT) + 1)
+
+
+# A juz can start part-way down a page (juz 7 on page 121 and juz 26 on
+# page 502), so starts are compared as (page, surah, ayah) and such a page
+# belongs to both juz
+_JUZ_STARTS = tuple(juz_start(juz) for juz in range(1, JUZ_COUNT + 1))
+
+
+def _starts_page(start):
+    page, surah, ayah = start
+    return page_ayah_range(page)[0] == (surah, ayah)
+
+
+def juz_page_range(juz):
+    """(first page, last page) of a juz, including pages it shares with its neighbours"""
+    start = juz_start(juz)[0]
+    if juz == JUZ_COUNT:
+        return start, TOTAL_PAGES
+    following = _JUZ_STARTS[juz]
+    return start, following[0] - 1 if _starts_page(following) else following[0]
+
+
+def juz_at_page(page):
+    """Juz (sipara) that the first line of a page belongs to"""
+    if not 1 <= page <= TOTAL_PAGES:
+        raise ValueError(f"page must be between 1 and {TOTAL_PAGES}, got {page}")
+    return bisect_right(_JUZ_STARTS, (page, *page_ayah_range(page)[0]))
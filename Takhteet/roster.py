@@ -0,0 +1,301 @@
+"""Generate Takhteet PDFs for a whole class from a roster CSV.
+
+Usage:
+    python roster.py students.csv --month 12 --year 2025 --out pdfs/
+
+Each row is one student. Columns (header names, case-insensitive):
+
+    name            student name (required)
+    direction       "backward" or "forward" (default: backward)
+    start_surah     backward plans: surah number to start in
+    start_page      page to start from (default: first page of start_surah)
+    target_page     page to stop at (required)
+    daily_amount    "0.5", "1", "mixed" or a number of lines such as
+                    "7 lines" (default: mixed)
+    extra_holidays  holidays at the end of the month (default: 4)
+    weekly_off      weekdays off every week, e.g. "fri" or "fri sat"
+                    (default: sun)
+    breaks          date ranges off, separated by ";", e.g.
+                    "2025-12-22..2025-12-31; 2026-01-05"
+    islamic_holidays  holidays from the Hijri calendar, separated by ";",
+                    e.g. "Eid al-Fitr; Eid al-Adha", or "all"
+    hijri_offset    days to move the Hijri dates by, -2 to 2 (default: 0)
+    murajjah        "auto", "manual" or "none" (default: auto)
+    murajjah_cycle  working days in the murajjah cycle: 5, 6 or 7 (default: 6)
+    manual_murajjah siparas per cycle day for "manual", days separated by
+                    ";" and siparas by spaces, e.g. "1 3;2;30;;5;"
+    current_sipara  current sipara for auto murajjah (default: derived
+                    from start_page)
+
+Schedules and PDFs are built in a process pool, one file per student per
+month. With --months N each student gets a continuous N-month plan.
+"""
+import argparse
+import calendar
+import csv
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import engine
+from engine import ScheduleConfig, MURAJJAH_CYCLE_DAYS, MURAJJAH_CYCLE_LENGTHS
+from holiday_calendar import DEFAULT_WEEKLY_OFF, ISLAMIC_HOLIDAYS
+from pdf_export import render_pdf
+from quran_data import SURAH_BY_NUMBER, juz_at_page
+
+DIRECTIONS = {
+    "backward": engine.DIRECTION_BACKWARD,
+    "forward": engine.DIRECTION_FORWARD,
+}
+DAILY_AMOUNTS = {
+    "0.5": "0.5 page daily",
+    "half": "0.5 page daily",
+    "1": "1 page daily",
+    "full": "1 page daily",
+    "mixed": "Mixed (0.5 & 1 page)",
+}
+MURAJJAH = {
+    "auto": "Auto Generate",
+    "manual": "Manual Selection",
+    "none": "No Murajjah",
+}
+
+
+def _choice(value, choices, default, column):
+    """Map a CSV cell onto one of the engine's option labels
+
+    Only a key of choices or a label itself (case-insensitive) is accepted;
+    anything else is an error rather than a guess.
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return default
+    for key, label in choices.items():
+        if value == key or value == label.lower():
+            return label
+    raise ValueError(f"unknown {column} {value!r} (expected one of: {', '.join(choices)})")
+
+
+def _daily_amount(text):
+    """Daily amount label from a CSV cell; "N lines" gives N lines a day"""
+    match = re.fullmatch(r"(\d+)\s*lines?(?:\s+daily)?", (text or "").strip().lower())
+    if match:
+        lines = int(match.group(1))
+        engine.line_units(lines)  # 1 to 15 lines
+        return f"{lines} lines daily"
+    return _choice(text, DAILY_AMOUNTS, "Mixed (0.5 & 1 page)", "daily_amount")
+
+
+def _weekly_off(text):
+    """Weekday numbers from "fri sat" / "Friday, Saturday" """
+    if not text:
+        return DEFAULT_WEEKLY_OFF
+    days = []
+    for word in text.replace(",", " ").split():
+        matches = [i for i, name in enumerate(calendar.day_name) if name.lower().startswith(word.lower()[:3])]
+        if len(word) < 3 or not matches:
+            raise ValueError(f"unknown weekly_off day {word!r}")
+        days.append(matches[0])
+    return tuple(sorted(set(days)))
+
+
+def _breaks(text):
+    """((first, last), ...) from "2025-12-22..2025-12-31; 2026-01-05" """
+    breaks = []
+    for part in (text or "").split(";"):
+        if not part.strip():
+            continue
+        first, _, last = part.partition("..")
+        first = date.fromisoformat(first.strip())
+        breaks.append((first, date.fromisoformat(last.strip()) if last.strip() else first))
+    return tuple(breaks)
+
+
+def _islamic_holidays(text):
+    """Names from ISLAMIC_HOLIDAYS, matched case-insensitively; "all" for every one"""
+    if (text or "").strip().lower() == "all":
+        return tuple(ISLAMIC_HOLIDAYS)
+    names = {name.lower(): name for name in ISLAMIC_HOLIDAYS}
+    holidays = []
+    for part in (text or "").split(";"):
+        if part.strip():
+            if part.strip().lower() not in names:
+                raise ValueError(f"unknown islamic_holidays entry {part.strip()!r}")
+            holidays.append(names[part.strip().lower()])
+    return tuple(holidays)
+
+
+def _cycle_days(text):
+    """Murajjah cycle length from a CSV cell"""
+    if not text:
+        return MURAJJAH_CYCLE_DAYS
+    cycle_days = int(text)
+    if cycle_days not in MURAJJAH_CYCLE_LENGTHS:
+        raise ValueError(f"murajjah_cycle must be one of {', '.join(map(str, MURAJJAH_CYCLE_LENGTHS))}")
+    return cycle_days
+
+
+def _manual_murajjah(text, cycle_days=MURAJJAH_CYCLE_DAYS):
+    """Parse "1 3;2;30;;5;" into one sipara mask per cycle day"""
+    days = (text or "").split(";")
+    masks = []
+    for i in range(cycle_days):
+        cell = days[i] if i < len(days) else ""
+        masks.append(engine.sipara_mask(int(s) for s in cell.replace(",", " ").split()))
+    return tuple(masks)
+
+
+def config_from_row(row, month, year):
+    """Build a ScheduleConfig from one roster row"""
+    # csv.DictReader puts cells beyond the header in a list under None;
+    # empty ones (a trailing comma) are harmless
+    extra = row.get(None) or []
+    if any(cell.strip() for cell in extra):
+        raise ValueError("row has more cells than the header")
+    row = {k.strip().lower(): (v or "").strip() for k, v in row.items() if k is not None}
+    if not row.get("name"):
+        raise ValueError("missing name")
+    if not row.get("target_page"):
+        raise ValueError("missing target_page")
+
+    direction = _choice(row.get("direction"), DIRECTIONS, engine.DIRECTION_BACKWARD, "direction")
+    start_surah = int(row["start_surah"]) if row.get("start_surah") else None
+    if row.get("start_page"):
+        start_page = float(row["start_page"])
+    elif start_surah in SURAH_BY_NUMBER:
+        start_page = float(SURAH_BY_NUMBER[start_surah]["start_page"])
+    else:
+        raise ValueError("need start_page or a known start_surah")
+
+    current_sipara = row.get("current_sipara")
+    cycle_days = _cycle_days(row.get("murajjah_cycle"))
+    config = ScheduleConfig(
+        month=month,
+        year=year,
+        direction=direction,
+        start_page=start_page if "Backward" in direction else int(start_page),
+        end_page=int(row["target_page"]),
+        start_surah=start_surah if "Backward" in direction else None,
+        daily_amount=_daily_amount(row.get("daily_amount")),
+        extra_holidays=int(row["extra_holidays"]) if row.get("extra_holidays") else 4,
+        murajjah_option=_choice(row.get("murajjah"), MURAJJAH, "Auto Generate", "murajjah"),
+        current_sipara=int(current_sipara) if current_sipara else juz_at_page(int(start_page)),
+        manual_murajjah=_manual_murajjah(row.get("manual_murajjah"), cycle_days),
+        murajjah_cycle_days=cycle_days,
+        weekly_off=_weekly_off(row.get("weekly_off")),
+        breaks=_breaks(row.get("breaks")),
+        islamic_holidays=_islamic_holidays(row.get("islamic_holidays")),
+        hijri_offset=int(row["hijri_offset"]) if row.get("hijri_offset") else 0,
+    )
+    config.holiday_rules  # ValueError for holiday settings that cannot work
+    return config
+
+
+def _safe_name(student_name):
+    """Student name as a file-name part"""
+    return re.sub(r"[^\w\-]+", "_", student_name).strip("_") or "student"
+
+
+def _file_name(safe_name, month_name, year):
+    return f"takhteet_{safe_name}_{month_name}_{year}.pdf"
+
+
+def _plain(message):
+    """Diagnostic text without the markdown decoration"""
+    return " ".join(message.replace("*", "").split())
+
+
+def build_student(student_name, config, months, out_dir, safe_name=None):
+    """Schedule one student and write their PDF(s); returns (written paths, errors)
+
+    safe_name is the name used in the file names (default: derived from
+    student_name). Runs inside a worker process, so it only takes and
+    returns plain data.
+    """
+    safe_name = safe_name or _safe_name(student_name)
+    if months > 1:
+        results = engine.plan_months(config, months)
+    else:
+        results = [engine.calculate_schedule(config)]
+
+    written, errors = [], []
+    for result in results:
+        month_name = datetime(2000, result.config.month, 1).strftime('%B')
+        if not result.ok:
+            errors.extend(_plain(d.message) for d in result.diagnostics if d.level == "error")
+            break
+        pdf_bytes = render_pdf(student_name, month_name, result.config.year, result.days)
+        path = os.path.join(out_dir, _file_name(safe_name, month_name, result.config.year))
+        with open(path, "wb") as f:
+            f.write(pdf_bytes)
+        written.append(path)
+    return written, errors
+
+
+def main(argv=None):
+    today = date.today()
+    parser = argparse.ArgumentParser(description="Generate Takhteet PDFs for every student in a roster CSV")
+    parser.add_argument("roster", help="roster CSV file")
+    parser.add_argument("--month", type=int, default=today.month, help="first month to plan (1-12)")
+    parser.add_argument("--year", type=int, default=today.year, help="year of the first month")
+    parser.add_argument("--months", type=int, default=1,
+                        help=f"months to plan per student (1-{engine.MAX_PLAN_MONTHS})")
+    parser.add_argument("--out", default="takhteet_pdfs", help="output directory")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if not 1 <= args.month <= 12:
+        parser.error("--month must be between 1 and 12")
+    if not 1 <= args.months <= engine.MAX_PLAN_MONTHS:
+        parser.error(f"--months must be between 1 and {engine.MAX_PLAN_MONTHS}")
+
+    jobs = []
+    used_names = set()
+    skipped = failed = 0
+    with open(args.roster, newline="", encoding="utf-8-sig") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                config = config_from_row(row, args.month, args.year)
+            except ValueError as e:
+                print(f"line {line_no}: skipped ({e})", file=sys.stderr)
+                skipped += 1
+                continue
+            name = next(v for k, v in row.items() if (k or "").strip().lower() == "name").strip()
+            # Students with the same name would overwrite each other's PDFs
+            safe_name = base_name = _safe_name(name)
+            suffix = 2
+            while safe_name.lower() in used_names:
+                safe_name = f"{base_name}_{suffix}"
+                suffix += 1
+            if safe_name != base_name:
+                print(f"line {line_no}: {name!r} has the same file name as an earlier student, "
+                      f"writing it as {safe_name}", file=sys.stderr)
+            used_names.add(safe_name.lower())
+            jobs.append((name, safe_name, config))
+
+    os.makedirs(args.out, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [
+            (name, pool.submit(build_student, name, config, args.months, args.out, safe_name))
+            for name, safe_name, config in jobs
+        ]
+        for name, future in futures:
+            try:
+                written, errors = future.result()
+            except Exception as e:
+                written, errors = [], [f"{type(e).__name__}: {e}"]
+            for path in written:
+                print(path)
+            if errors:
+                failed += 1
+                for message in errors:
+                    print(f"{name}: {message}", file=sys.stderr)
+
+    print(f"{len(jobs) - failed} of {len(jobs) + skipped} students done", file=sys.stderr)
+    return 1 if failed or skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Regression tests for the scheduling engine.
+
+Run from the Takhteet directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+from dataclasses import replace
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+from engine import PAGE_UNITS, JuzhaliWindow, ScheduleConfig
+
+
+@pytest.mark.parametrize("lines", [5, 7, 10])
+def test_line_amounts_keep_juzhali_at_ten_pages(lines):
+    # Al-Baqarah from page 2: days of lines run over page boundaries
+    amount = f"{lines} lines daily"
+    schedule = engine.generate_backward_schedule(2, 2.0, amount, 60)
+    window = JuzhaliWindow()
+    for day in schedule:
+        first, last = window.add(day["cursor"], day["units"])
+        # 10 pages, plus the page the day ends on when it is half done
+        assert last - first + 1 <= 11
+    done = schedule[-1]["cursor"] + schedule[-1]["units"]
+    assert window.partial_pages == ([done // PAGE_UNITS] if done % PAGE_UNITS else [])
+
+
+def test_line_amounts_split_over_pages():
+    window = JuzhaliWindow()
+    window.add(10 * PAGE_UNITS + 20, engine.line_units(10))
+    assert window.page_totals == {10: 10, 11: 10}
+    assert window.partial_pages == [10, 11]
+
+
+def test_full_page_started_mid_page_completes_both_pages():
+    window = JuzhaliWindow()
+    assert window.add(580 * PAGE_UNITS, PAGE_UNITS) == (580, 589)
+    assert window.add(581 * PAGE_UNITS, engine.HALF_PAGE_UNITS) == (580, 590)
+    # Second half of 581 and first half of 582
+    assert window.add(581 * PAGE_UNITS + 15, PAGE_UNITS) == (580, 590)
+    assert window.page_totals == {580: 30, 581: 30, 582: 15}
+    assert window.add(582 * PAGE_UNITS + 15, engine.HALF_PAGE_UNITS) == (580, 589)
+    assert window.partial_pages == []
+
+
+def test_mixed_month_leaves_no_half_done_pages_behind():
+    config = ScheduleConfig(month=12, year=2025, start_page=580.0, end_page=565,
+                            daily_amount="Mixed (0.5 & 1 page)")
+    days = [day for day in engine.calculate_schedule(config).days if not day.is_holiday]
+    assert {day.units for day in days} == {engine.HALF_PAGE_UNITS, PAGE_UNITS}
+    window = JuzhaliWindow()
+    for day in days:
+        first, last = window.add(day.start_cursor, day.units)
+        assert last - first + 1 <= 11
+    assert len(window.partial_pages) <= 1
+
+
+@pytest.mark.parametrize("lines", [5, 7, 10])
+def test_recompute_matches_calculated_juzhali(lines):
+    config = ScheduleConfig(month=12, year=2025, start_page=2.0, end_page=9, start_surah=2,
+                            daily_amount=f"{lines} lines daily", extra_holidays=0)
+    days = engine.calculate_schedule(config).days
+    assert days
+    assert [day.juzhali for day in engine.recompute_schedule(config, days)] == [day.juzhali for day in days]
+
+
+@pytest.mark.parametrize("months", [6, 12])
+def test_mixed_plan_keeps_half_page_days(months):
+    config = ScheduleConfig(month=1, year=2026, start_page=580.0, end_page=511,
+                            daily_amount="Mixed (0.5 & 1 page)")
+    results = list(engine.plan_months(config, months))
+    assert all(result.ok for result in results)
+    for result in results:
+        assert any(day.units == engine.HALF_PAGE_UNITS for day in result.days)
+
+
+@pytest.mark.parametrize("direction, start_page, end_page", [
+    (engine.DIRECTION_BACKWARD, 580.0, 511),
+    (engine.DIRECTION_FORWARD, 418, 500),
+])
+def test_plan_goes_on_after_a_month_long_break(direction, start_page, end_page):
+    config = ScheduleConfig(month=6, year=2026, direction=direction, start_page=start_page,
+                            end_page=end_page, breaks=((date(2026, 7, 1), date(2026, 7, 31)),))
+    june, july, august = engine.plan_months(config, 3)
+    assert june.ok and july.ok and august.ok
+    assert all(day.is_holiday for day in july.days) and len(july.days) == 31
+    # August continues where June stopped
+    assert july.config.start_page == august.config.start_page
+    last_june = [day for day in june.days if not day.is_holiday][-1]
+    first_august = next(day for day in august.days if not day.is_holiday)
+    assert first_august.start_cursor == last_june.start_cursor + last_june.units
+
+
+# ---- equivalence with the implementations the engine replaced ----
+
+def _search_optimal_mix(total_pages, available_days):
+    """The original find_optimal_mix: try every number of full days"""
+    if available_days < total_pages:
+        return None, None
+    for full_days in range(0, available_days + 1):
+        half_days = available_days - full_days
+        total_possible = (full_days * 1.0) + (half_days * 0.5)
+        if total_possible >= total_pages:
+            pattern = []
+            if full_days > 0:
+                spacing = max(1, half_days // full_days)
+                half_counter = 0
+                for i in range(available_days):
+                    if half_counter >= spacing and full_days > 0:
+                        pattern.append(1.0)
+                        full_days -= 1
+                        half_counter = 0
+                    elif half_days > 0:
+                        pattern.append(0.5)
+                        half_days -= 1
+                        half_counter += 1
+                    elif full_days > 0:
+                        pattern.append(1.0)
+                        full_days -= 1
+            else:
+                pattern = [0.5] * available_days
+            return pattern, total_possible
+    return None, None
+
+
+def test_find_optimal_mix_matches_the_search_loop():
+    for available_days in range(0, 32):
+        for total_pages in range(0, 35):
+            pattern, total = engine.find_optimal_mix(total_pages, available_days)
+            old_pattern, old_total = _search_optimal_mix(total_pages, available_days)
+            assert total == old_total
+            if old_pattern is None:
+                assert pattern is None
+            else:
+                assert [units / PAGE_UNITS for units in pattern] == old_pattern
+
+
+def test_sipara_masks_round_trip():
+    assert engine.sipara_mask(()) == 0
+    assert engine.sipara_mask((1, 30)) == 1 | 1 << 29
+    assert engine.sipara_mask(range(1, 31)) == engine.ALL_SIPARAS_MASK
+    for siparas in ((), (1,), (30,), (2, 5, 7), (3, 1, 3), tuple(range(1, 31, 4))):
+        assert engine.mask_siparas(engine.sipara_mask(siparas)) == tuple(sorted(set(siparas)))
+    for sipara in (0, 31):
+        with pytest.raises(ValueError):
+            engine.sipara_mask((sipara,))
+
+
+def _bucket_murajjah(day_number, current_sipara, is_backward, for_pdf):
+    """The original auto murajjah: completed siparas dealt into 6 buckets"""
+    if is_backward:
+        completed = list(range(30, current_sipara, -1))
+    else:
+        completed = list(range(1, current_sipara))
+    if not completed:
+        return "Revision" if for_pdf else "Revision Day"
+    completed_sorted = sorted(completed)
+    if len(completed_sorted) <= 6:
+        day_index = day_number % 6
+        if day_index >= len(completed_sorted):
+            return "Revision" if for_pdf else "Revision Day"
+        day_paras = [completed_sorted[day_index]]
+    else:
+        buckets = [[] for _ in range(6)]
+        for i, sipara in enumerate(completed_sorted):
+            buckets[i % 6].append(sipara)
+        day_paras = buckets[day_number % 6]
+    if for_pdf:
+        return ", ".join(str(p) for p in sorted(set(day_paras)))
+    return ", ".join(f"Para {p}" for p in sorted(set(day_paras)))
+
+
+def test_auto_murajjah_matches_the_bucket_rotation():
+    for direction in (engine.DIRECTION_BACKWARD, engine.DIRECTION_FORWARD):
+        for current_sipara in range(1, 31):
+            config = ScheduleConfig(month=12, year=2025, direction=direction, current_sipara=current_sipara)
+            for day in range(14):
+                for for_pdf in (False, True):
+                    assert engine.get_murajjah_for_day(day, config, for_pdf) == _bucket_murajjah(
+                        day, current_sipara, config.is_backward, for_pdf)
+
+
+def test_manual_murajjah_matches_the_selected_lists():
+    selections = [[1, 3], [], [30], [2, 5, 7], [], [9]]
+    config = ScheduleConfig(month=12, year=2025, murajjah_option="Manual Selection",
+                            manual_murajjah=tuple(engine.sipara_mask(s) for s in selections))
+    for day in range(14):
+        selected = selections[day % 6]
+        assert engine.get_murajjah_for_day(day, config) == (
+            ", ".join(f"Para {s}" for s in selected) if selected else "Not assigned")
+        assert engine.get_murajjah_for_day(day, config, for_pdf=True) == ", ".join(str(s) for s in selected)
+
+    config = replace(config, murajjah_option="No Murajjah")
+    assert engine.get_murajjah_for_day(0, config) == "Teacher will assign"
+    assert engine.get_murajjah_for_day(0, config, for_pdf=True) == ""
+
+
+def test_recompute_keeps_overridden_values_only():
+    config = ScheduleConfig(month=12, year=2025, start_page=580.0, end_page=565)
+    days = engine.calculate_schedule(config).days
+    working = [i for i, day in enumerate(days) if not day.is_holiday]
+    juzhali_day, murajjah_day, edited_day = working[3], working[4], working[1]
+
+    edited = [day.copy() for day in days]
+    edited[juzhali_day].juzhali = (1, 2)
+    edited[juzhali_day].murajjah = (5,)
+    edited[juzhali_day].overrides = engine.OVERRIDE_JUZHALI
+    edited[murajjah_day].juzhali = (3, 4)
+    edited[murajjah_day].murajjah = (5,)
+    edited[murajjah_day].overrides = engine.OVERRIDE_MURAJJAH
+    # A Jadeed edit changes the Juzhali of the days after it
+    edited[edited_day].page += 1
+    edited[edited_day].cursor = None
+
+    result = engine.recompute_schedule(config, edited, start_index=edited_day)
+    assert result[:edited_day] == days[:edited_day]
+    assert result[juzhali_day].juzhali == (1, 2)
+    assert result[juzhali_day].murajjah == days[juzhali_day].murajjah
+    assert result[murajjah_day].murajjah == (5,)
+    assert result[murajjah_day].juzhali not in ((3, 4), None)
+    assert [day.juzhali for day in result] != [day.juzhali for day in days]
+
+    # Without overrides, recomputing the untouched days gives them back
+    for day in edited:
+        day.overrides = 0
+    edited[edited_day] = days[edited_day].copy()
+    assert engine.recompute_schedule(config, edited) == days
@@ -0,0 +1,87 @@
+"""Tests for the holiday calendar and the Hijri date conversion.
+
+Run from the Takhteet directory:
+    python -m pytest -q tests
+"""
+import calendar
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from holiday_calendar import (
+    HolidayRules,
+    date_from_hijri,
+    hijri_from_date,
+    islamic_holiday_days,
+    month_mask,
+)
+
+
+def test_hijri_epoch_and_known_dates():
+    assert date_from_hijri(1, 1, 1) == date(622, 7, 19)
+    assert date_from_hijri(1445, 1, 1) == date(2023, 7, 19)
+    assert date_from_hijri(1446, 10, 1) == date(2025, 3, 31)
+    assert hijri_from_date(date(2025, 3, 30)) == (1446, 9, 30)
+
+
+def test_hijri_round_trip():
+    day = date(2020, 1, 1)
+    while day < date(2030, 1, 1):
+        assert date_from_hijri(*hijri_from_date(day)) == day
+        day += timedelta(days=1)
+
+
+def test_islamic_holidays_and_offset():
+    assert islamic_holiday_days(2025, 3, ("Eid al-Fitr",)) == (31,)
+    assert islamic_holiday_days(2025, 3, ("Eid al-Fitr",), hijri_offset=-1) == (30, 31)
+    assert islamic_holiday_days(2025, 3, ()) == ()
+
+
+def test_default_rules_are_sundays_and_last_four_days():
+    mask = month_mask(2025, 12)
+    assert mask.weekly_off == (7, 14, 21, 28)
+    # Day 28 is a Sunday already, so only three more days are taken off
+    assert mask.extra == (29, 30, 31)
+    assert mask.holidays == (7, 14, 21, 28, 29, 30, 31)
+    assert mask.working_days == 24
+    assert mask.max_working_days == 27
+    assert [day for day in range(1, 32) if mask.is_working(day)] == \
+        [day for day in range(1, 32) if day not in mask.holidays]
+
+
+def test_weekly_off_breaks_and_islamic_holidays():
+    rules = HolidayRules(weekly_off=(calendar.FRIDAY, calendar.SATURDAY), extra_holidays=0,
+                         breaks=((date(2025, 3, 20), date(2025, 3, 24)),),
+                         islamic_holidays=("Eid al-Fitr",))
+    mask = month_mask(2025, 3, rules)
+    assert mask.weekly_off == (1, 7, 8, 14, 15, 21, 22, 28, 29)
+    # 21 and 22 are a weekend already; each day is listed once
+    assert mask.breaks == (20, 23, 24)
+    assert mask.islamic == (31,)
+    assert mask.working_days == 31 - 9 - 3 - 1
+
+
+def test_break_across_months_and_whole_month():
+    rules = HolidayRules(extra_holidays=0, breaks=((date(2025, 12, 30), date(2026, 2, 2)),))
+    assert month_mask(2025, 12, rules).breaks == (30, 31)
+    january = month_mask(2026, 1, rules)
+    assert january.working_days == 0
+    assert not any(january.is_working(day) for day in range(1, 32))
+    assert month_mask(2026, 2, rules).breaks == (2,)
+
+
+def test_bad_rules_are_rejected():
+    with pytest.raises(ValueError):
+        HolidayRules(weekly_off=tuple(range(7)))
+    with pytest.raises(ValueError):
+        HolidayRules(extra_holidays=-1)
+    with pytest.raises(ValueError):
+        HolidayRules(breaks=((date(2025, 12, 5), date(2025, 12, 1)),))
+    with pytest.raises(ValueError):
+        HolidayRules(islamic_holidays=("Christmas",))
+    with pytest.raises(ValueError):
+        HolidayRules(hijri_offset=3)
@@ -0,0 +1,38 @@
+"""Tests for the rendered-PDF cache.
+
+Run from the Takhteet directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+import pdf_export
+from engine import ScheduleConfig
+
+
+def test_cache_key_follows_the_schedule_content(monkeypatch):
+    rendered = []
+    monkeypatch.setattr(pdf_export, "render_pdf", lambda *args: rendered.append(args) or b"%PDF")
+    pdf_export.clear_pdf_cache()
+
+    days = engine.calculate_schedule(ScheduleConfig(month=12, year=2025, end_page=565)).days
+    same = [day.copy() for day in days]
+    assert pdf_export.pdf_cache_key("Aisha", "December", 2025, days) == \
+        pdf_export.pdf_cache_key("Aisha", "December", 2025, same)
+
+    pdf_export.render_pdf_cached("Aisha", "December", 2025, days)
+    pdf_export.render_pdf_cached("Aisha", "December", 2025, same)
+    assert len(rendered) == 1
+
+    # Editing any day, or the header, renders again
+    edited = [day.copy() for day in days]
+    working = next(day for day in edited if not day.is_holiday)
+    working.murajjah = (7,)
+    working.overrides = engine.OVERRIDE_MURAJJAH
+    pdf_export.render_pdf_cached("Aisha", "December", 2025, edited)
+    pdf_export.render_pdf_cached("Maryam", "December", 2025, days)
+    assert len(rendered) == 3
+    pdf_export.clear_pdf_cache()
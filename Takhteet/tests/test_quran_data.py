@@ -0,0 +1,108 @@
+"""Tests for the packed Mushaf lookups.
+
+Run from the Takhteet directory:
+    python -m pytest -q tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quran_data import (
+    JUZ_COUNT,
+    SURAH_BY_NUMBER,
+    SURAH_DATA_BACKWARD,
+    TOTAL_PAGES,
+    get_next_surah_backward,
+    get_previous_surah_backward,
+    get_surah_at_page,
+    juz_at_page,
+    juz_page_range,
+    juz_start,
+    page_ayah_range,
+)
+
+# (surah, start page, end page) from the hand-written table the packed file
+# replaced, which covered surahs 114 down to 45
+HAND_WRITTEN_SURAHS = (
+    (114, 604, 604), (113, 604, 604), (112, 604, 604), (111, 603, 603), (110, 603, 603),
+    (109, 603, 603), (108, 602, 602), (107, 602, 602), (106, 602, 602), (105, 601, 601),
+    (104, 601, 601), (103, 601, 601), (102, 600, 600), (101, 600, 600), (100, 599, 600),
+    (99, 599, 599), (98, 598, 599), (97, 598, 598), (96, 597, 597), (95, 597, 597),
+    (94, 596, 596), (93, 596, 596), (92, 595, 596), (91, 595, 595), (90, 594, 594),
+    (89, 593, 594), (88, 592, 592), (87, 591, 592), (86, 591, 591), (85, 590, 590),
+    (84, 589, 589), (83, 587, 589), (82, 587, 587), (81, 586, 586), (80, 585, 585),
+    (79, 583, 584), (78, 582, 583), (77, 580, 581), (76, 578, 580), (75, 577, 578),
+    (74, 575, 577), (73, 574, 575), (72, 572, 573), (71, 570, 571), (70, 568, 570),
+    (69, 566, 568), (68, 564, 566), (67, 562, 564), (66, 560, 561), (65, 558, 559),
+    (64, 556, 557), (63, 554, 555), (62, 553, 554), (61, 551, 552), (60, 549, 551),
+    (59, 545, 548), (58, 542, 545), (57, 537, 541), (56, 534, 537), (55, 531, 534),
+    (54, 528, 531), (53, 526, 528), (52, 523, 525), (51, 520, 523), (50, 518, 520),
+    (49, 515, 517), (48, 511, 515), (47, 507, 510), (46, 502, 506), (45, 499, 502),
+)
+# Surahs whose last page the hand-written table cut one page short
+CORRECTED_END_PAGES = {96: 598, 94: 597, 90: 595, 88: 593, 84: 590, 80: 586}
+
+
+def test_juz_starting_mid_page():
+    # Juz 7 starts at 5:82 and juz 26 at 46:1, below the top of their pages
+    assert juz_start(7) == (121, 5, 82)
+    assert page_ayah_range(121)[0] == (5, 78)
+    assert juz_start(26) == (502, 46, 1)
+    assert page_ayah_range(502)[0] == (45, 33)
+
+    # The page goes to the juz its first line is in, and both ranges hold it
+    assert juz_at_page(121) == 6 and juz_at_page(122) == 7
+    assert juz_at_page(502) == 25 and juz_at_page(503) == 26
+    assert juz_page_range(6) == (102, 121) and juz_page_range(7) == (121, 141)
+    assert juz_page_range(25) == (482, 502) and juz_page_range(26) == (502, 521)
+
+
+def test_juz_ranges_cover_the_mushaf():
+    ranges = [juz_page_range(juz) for juz in range(1, JUZ_COUNT + 1)]
+    assert ranges[0][0] == 1 and ranges[-1][1] == TOTAL_PAGES
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert start in (end, end + 1)
+
+    for page in range(1, TOTAL_PAGES + 1):
+        juz = juz_at_page(page)
+        first, last = juz_page_range(juz)
+        assert first <= page <= last
+        # The page's first ayah is at or after the juz start, and before the next
+        top = (page, *page_ayah_range(page)[0])
+        assert juz_start(juz) <= top
+        if juz < JUZ_COUNT:
+            assert top < juz_start(juz + 1)
+
+
+def test_surahs_match_the_hand_written_table():
+    for surah, start_page, end_page in HAND_WRITTEN_SURAHS:
+        record = SURAH_BY_NUMBER[surah]
+        assert record["start_page"] == start_page
+        assert record["end_page"] == CORRECTED_END_PAGES.get(surah, end_page)
+    assert [s["surah"] for s in SURAH_DATA_BACKWARD] == list(range(114, 0, -1))
+
+
+def _scan_surah_at_page(page):
+    """The original lookup: first surah in backward order containing the page"""
+    for surah in SURAH_DATA_BACKWARD:
+        if surah["start_page"] <= page <= surah["end_page"]:
+            return surah
+    return None
+
+
+def test_page_lookups_match_a_linear_scan():
+    for page in range(0, TOTAL_PAGES + 2):
+        assert get_surah_at_page(page) is _scan_surah_at_page(page)
+        # Half pages only belong to surahs that go on past the page
+        half = _scan_surah_at_page(page) if page < TOTAL_PAGES else None
+        if half is not None and half["end_page"] == page:
+            half = next((s for s in SURAH_DATA_BACKWARD if s["start_page"] <= page < s["end_page"]), None)
+        assert get_surah_at_page(page + 0.5) is half
+
+    for i, surah in enumerate(SURAH_DATA_BACKWARD):
+        following = SURAH_DATA_BACKWARD[i + 1] if i + 1 < len(SURAH_DATA_BACKWARD) else None
+        previous = SURAH_DATA_BACKWARD[i - 1] if i else None
+        assert get_next_surah_backward(surah["surah"]) is following
+        assert get_previous_surah_backward(surah["surah"]) is previous
+    assert get_next_surah_backward(0) is None
@@ -0,0 +1,56 @@
+"""Tests for reading roster CSV rows.
+
+Run from the Takhteet directory:
+    python -m pytest -q tests
+"""
+import csv
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine
+import roster
+
+
+def _rows(text):
+    return list(csv.DictReader(io.StringIO(text)))
+
+
+def test_trailing_comma_is_ignored():
+    row, = _rows("name,start_surah,target_page\nAisha,78,575,\n")
+    config = roster.config_from_row(row, 12, 2025)
+    assert config.start_surah == 78
+    assert config.end_page == 575
+
+
+def test_extra_cells_skip_the_row():
+    row, = _rows("name,start_surah,target_page\nAisha,78,575,7 lines\n")
+    with pytest.raises(ValueError, match="more cells than the header"):
+        roster.config_from_row(row, 12, 2025)
+
+
+def test_options_match_keys_and_labels_exactly():
+    assert roster._daily_amount("") == "Mixed (0.5 & 1 page)"
+    assert roster._daily_amount("Half") == "0.5 page daily"
+    assert roster._daily_amount("1") == "1 page daily"
+    assert roster._daily_amount("1 page daily") == "1 page daily"
+    assert roster._daily_amount("7 lines") == "7 lines daily"
+    assert roster._choice("Forward", roster.DIRECTIONS, None, "direction") == engine.DIRECTION_FORWARD
+    assert roster._choice(engine.DIRECTION_BACKWARD, roster.DIRECTIONS, None, "direction") == engine.DIRECTION_BACKWARD
+    for value in ("15", "10", "1.5", "halfpage"):
+        with pytest.raises(ValueError):
+            roster._daily_amount(value)
+    with pytest.raises(ValueError):
+        roster._choice("back", roster.DIRECTIONS, None, "direction")
+
+
+def test_default_sipara_is_the_juz_at_the_top_of_the_start_page():
+    # Page 121 opens in juz 6; juz 7 starts further down it
+    row, = _rows("name,direction,start_page,target_page\nAisha,Forward,121,140\n")
+    assert roster.config_from_row(row, 12, 2025).current_sipara == 6
+    row, = _rows("name,direction,start_page,target_page\nAisha,Forward,122,140\n")
+    assert roster.config_from_row(row, 12, 2025).current_sipara == 7
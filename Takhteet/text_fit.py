@@ -0,0 +1,78 @@
+"""Text measuring and truncation for the PDF cells.
+
+fpdf's get_string_width() runs the full text pipeline (normalisation, bidi,
+fragments) for every call. The PDF only needs plain single-font widths, so
+the glyph widths of each font are read into a table once and widths become
+sums over that table. Truncation finds the longest prefix that fits next to
+the ellipsis from the running widths instead of guessing a character count.
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+ELLIPSIS = "..."
+
+# Per-font glyph widths in 1/1000 em, keyed by (fontkey, font name)
+_width_tables = {}
+
+
+def _width_table(font):
+    """Character -> width table for an fpdf core or TrueType font"""
+    key = (font.fontkey, font.name)
+    table = _width_tables.get(key)
+    if table is None:
+        if getattr(font, "type", None) == "TTF":
+            table = {chr(code): width for code, width in font.cw.items()}
+            default = font.desc.missing_width
+        else:
+            table = dict(font.cw)
+            default = 0
+        table = (table, default)
+        _width_tables[key] = table
+    return table
+
+
+class TextFitter:
+    """Widths and fitting for one font at one size (all lengths in mm)"""
+
+    def __init__(self, widths, default_width, size_pt, scale):
+        self._widths = widths
+        self._default = default_width
+        # 1/1000 em -> user units (mm)
+        self._factor = size_pt / 1000 / scale
+        self.ellipsis_width = self.width(ELLIPSIS)
+
+    def _char_widths(self, text):
+        get = self._widths.get
+        default = self._default
+        return [get(c, default) for c in text]
+
+    def width(self, text):
+        return sum(self._char_widths(text)) * self._factor
+
+    def fit(self, text, max_width):
+        """text itself if it fits, else its longest prefix that fits with "..." """
+        char_widths = self._char_widths(text)
+        if sum(char_widths) * self._factor <= max_width:
+            return text
+        budget = (max_width - self.ellipsis_width) / self._factor
+        keep = bisect_right(list(accumulate(char_widths)), budget)
+        return text[:keep] + ELLIPSIS
+
+    def fit_row(self, texts, max_widths):
+        """fit() for every cell of a row"""
+        return [self.fit(text, max_width) if text else text
+                for text, max_width in zip(texts, max_widths)]
+
+
+@lru_cache(maxsize=64)
+def _fitter(fontkey, name, size_pt, scale):
+    widths, default = _width_tables[(fontkey, name)]
+    return TextFitter(widths, default, size_pt, scale)
+
+
+def text_fitter(pdf):
+    """TextFitter for the pdf's current font and size"""
+    font = pdf.current_font
+    _width_table(font)
+    return _fitter(font.fontkey, font.name, pdf.font_size_pt, pdf.k)
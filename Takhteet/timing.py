@@ -0,0 +1,95 @@
+"""Optional per-stage timings for schedule generation and PDF export.
+
+Off by default. With TAKHTEET_TIMINGS=1 in the environment, every app run
+records how long each stage took (feasibility checks, the Jadeed walk,
+Juzhali, murajjah and day records, table building, PDF rendering) and
+shows them in a debug panel. TAKHTEET_TIMINGS_FILE=path additionally appends each stage as
+one JSON line to that file.
+
+Code marks the end of each stage on a timer:
+
+    timer = timing.timer("calculate_schedule")
+    ...
+    timer.mark("feasibility")
+
+Outside collect(), or when timings are off, timer() hands out a shared
+no-op timer, so the marks cost one method call.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("TAKHTEET_TIMINGS", "").strip().lower() not in ("", "0", "false", "no")
+JSONL_PATH = os.environ.get("TAKHTEET_TIMINGS_FILE") or None
+
+# Streamlit runs each session's script in its own thread
+_local = threading.local()
+_file_lock = threading.Lock()
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def mark(self, stage):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class StageTimer:
+    """Records the time since the previous mark (or since creation) per stage"""
+
+    def __init__(self, scope, records):
+        self.scope = scope
+        self._records = records
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self._records.append((f"{self.scope}.{stage}", now - self._last))
+        self._last = now
+
+
+def timer(scope):
+    """StageTimer for scope, or a no-op timer when nothing is collecting"""
+    records = getattr(_local, "records", None)
+    if records is None:
+        return NULL_TIMER
+    return StageTimer(scope, records)
+
+
+@contextmanager
+def collect(run_id=None):
+    """Collect the stage timings of the code in the with-block
+
+    Yields the list of (stage, seconds) pairs, filled in as stages end; it
+    stays empty when timings are off. The pairs are written to JSONL_PATH
+    when the block exits, even if it exits by an exception.
+    """
+    records = []
+    if not ENABLED:
+        yield records
+        return
+
+    previous = getattr(_local, "records", None)
+    _local.records = records
+    try:
+        yield records
+    finally:
+        _local.records = previous
+        if JSONL_PATH and records:
+            write_jsonl(records, JSONL_PATH, run_id)
+
+
+def write_jsonl(records, path, run_id=None):
+    """Append (stage, seconds) pairs to path, one JSON object per line"""
+    now = time.time()
+    lines = [
+        json.dumps({"time": round(now, 3), "run": run_id, "stage": stage, "ms": round(seconds * 1000, 3)})
+        for stage, seconds in records
+    ]
+    with _file_lock, open(path, "a", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
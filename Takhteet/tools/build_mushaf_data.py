@@ -0,0 +1,175 @@
+"""Build data/mushaf.bin, the packed Mushaf table read by quran_data.
+
+Usage:
+    python tools/build_mushaf_data.py path/to/hafs.json [--out data/mushaf.bin]
+
+The input is the word-level Hafs export of the KFGQPC Uthmanic Hafs release
+(format "quran-mushaf"): word offsets of every surah, ayah, page and juz
+start, the 114 surah names and the marks printed in the text. The Madinah
+page numbering it uses (604 pages; juz 7 and 26 start part-way down a
+page) is the one the app schedules by.
+
+Rub' (quarter hizb) starts are the juz starts, the places where the release
+prints the division sign (۞), and the surah openings in
+SURAH_OPENING_QUARTERS, where the Mushaf starts a quarter without printing
+the sign. The result is checked to have 8 quarters per juz.
+
+File layout (little endian), see quran_data for the reader:
+
+    header      magic b"TKMD", version, surah, page, juz, hizb and rub' counts
+    surahs      per surah: start page, end page, ayah count, first ayah
+                (0-based over the whole Mushaf), English name and Arabic
+                name as (offset, length) into the string table
+    pages       per page: surah and ayah of its first and last ayah
+    rub's       per quarter: page, surah and ayah it starts at
+                (every 4th is a hizb start, every 8th a juz start)
+    strings     UTF-8 names
+"""
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import unicodedata
+from bisect import bisect_right
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUT = os.path.join(os.path.dirname(HERE), "data", "mushaf.bin")
+
+MAGIC = b"TKMD"
+VERSION = 1
+HEADER = struct.Struct("<4sHHHHHH")
+SURAH = struct.Struct("<HHHHHBHB")
+PAGE = struct.Struct("<BHBH")
+RUB = struct.Struct("<HBH")
+
+SURAH_COUNT = 114
+PAGE_COUNT = 604
+JUZ_COUNT = 30
+RUB_PER_JUZ = 8
+
+# English names as the app has always spelled them, where a plain ASCII
+# folding of the release's transliteration differs
+NAME_FIXES = {
+    9: "At-Tawbah",
+    58: "Al-Mujadila",
+    92: "Al-Layl",
+    106: "Quraysh",
+    108: "Al-Kawthar",
+}
+# The Hafs font writes final alif maqsurah as yeh and hamzah on the line
+# under alif; the usual spelling of these names
+ARABIC_FIXES = {
+    34: "سبأ",
+    42: "الشورى",
+    78: "النبأ",
+}
+
+DIVISION_SIGN = "۞"
+# Surahs whose first ayah starts a quarter that the release does not mark
+SURAH_OPENING_QUARTERS = (
+    5, 7, 8, 16, 20, 22, 24, 25, 26, 27, 29, 30, 33, 40, 49,
+    55, 56, 62, 65, 66, 68, 69, 72, 75, 80, 82, 84, 87, 90, 94,
+)
+# Harakat, dagger alif and the small Quranic signs
+_ARABIC_MARKS = re.compile("[ً-ٰٟۖ-ۭ]")
+
+
+def ascii_name(name):
+    """"Al-Fātiḥah" -> "Al-Fatihah" """
+    for quote in "‘’ʿʾ":
+        name = name.replace(quote, "'")
+    name = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    name.encode("ascii")
+    return name
+
+
+def plain_arabic(name):
+    return _ARABIC_MARKS.sub("", name)
+
+
+def build(source):
+    words = source["words"]
+    surah_starts = source["surah_starts"]
+    ayah_starts = source["ayah_starts"]
+    page_starts = source["page_starts"]
+    juz_starts = source["juz_starts"]
+    surahs = source["surahs"]
+    word_count = len(words)
+    assert len(surahs) == SURAH_COUNT and len(page_starts) == PAGE_COUNT and len(juz_starts) == JUZ_COUNT
+
+    first_ayahs = [s["first_ayah"] for s in surahs]
+
+    def page_of(word):
+        return bisect_right(page_starts, word)
+
+    def surah_ayah(word):
+        ayah_index = bisect_right(ayah_starts, word) - 1
+        surah_index = bisect_right(first_ayahs, ayah_index) - 1
+        return surah_index + 1, ayah_index - first_ayahs[surah_index] + 1
+
+    # ---- quarters ----
+    division = next(i for i, mark in enumerate(source["mark_types"]) if mark["sign"] == DIVISION_SIGN)
+    printed = {position for position, kind in source["marks"] if kind == division}
+    openings = {surah_starts[number - 1] for number in SURAH_OPENING_QUARTERS}
+    assert not openings & printed
+    rubs = sorted(set(juz_starts) | printed | openings)
+    assert set(rubs) <= set(ayah_starts)
+    for juz in range(JUZ_COUNT):
+        start = juz_starts[juz]
+        assert rubs[juz * RUB_PER_JUZ] == start, f"juz {juz + 1} does not have {RUB_PER_JUZ} quarters"
+    assert len(rubs) == JUZ_COUNT * RUB_PER_JUZ
+
+    # ---- strings ----
+    strings = bytearray()
+
+    def add_string(text):
+        data = text.encode("utf-8")
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    out = bytearray(HEADER.pack(MAGIC, VERSION, SURAH_COUNT, PAGE_COUNT, JUZ_COUNT,
+                                JUZ_COUNT * 2, JUZ_COUNT * RUB_PER_JUZ))
+    for i, surah in enumerate(surahs):
+        number = i + 1
+        assert surah["number"] == number
+        last_word = (surah_starts[i + 1] if number < SURAH_COUNT else word_count) - 1
+        name = NAME_FIXES.get(number) or ascii_name(surah["name_en"])
+        arabic = ARABIC_FIXES.get(number) or plain_arabic(surah["name_ar"])
+        name_offset, name_len = add_string(name)
+        arabic_offset, arabic_len = add_string(arabic)
+        out += SURAH.pack(page_of(surah_starts[i]), page_of(last_word), surah["ayah_count"],
+                          surah["first_ayah"], name_offset, name_len, arabic_offset, arabic_len)
+
+    for page in range(PAGE_COUNT):
+        first_word = page_starts[page]
+        last_word = (page_starts[page + 1] if page + 1 < PAGE_COUNT else word_count) - 1
+        out += PAGE.pack(*surah_ayah(first_word), *surah_ayah(last_word))
+
+    for word in rubs:
+        out += RUB.pack(page_of(word), *surah_ayah(word))
+
+    out += strings
+    return bytes(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the packed Mushaf table from a Hafs word-level JSON export")
+    parser.add_argument("source", help="hafs.json")
+    parser.add_argument("--out", default=DEFAULT_OUT, help="output file (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    with open(args.source, encoding="utf-8") as f:
+        source = json.load(f)
+    data = build(source)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "wb") as f:
+        f.write(data)
+    print(f"wrote {args.out} ({len(data)} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())